@@ -4,11 +4,16 @@ Additional Features API Routes
 - Meal Planning
 """
 
+import json
+import time
+
 from flask import Blueprint, request, jsonify
 from typing import Dict, Any
 
 from core.similarity_engine import SimilarityEngine
 from core.meal_planner import MealPlanAssistant
+from core.cache import get_cache_manager, CacheManager
+from utils.fastjson import json_response
 
 
 features_bp = Blueprint('features', __name__, url_prefix='/api')
@@ -17,6 +22,72 @@ features_bp = Blueprint('features', __name__, url_prefix='/api')
 similarity_engine = None
 meal_planner = None
 
+cache = get_cache_manager()
+
+
+def _similar_recipes(recipe_id, limit, min_score):
+    """
+    Find similar recipes, caching the top-50 list per recipe id.
+
+    The corpus is static, so one cached descending-sorted list satisfies
+    any (limit, min_score) combination by filtering and slicing — repeat
+    hits skip the TF-IDF fit and candidate queries entirely.
+    """
+    cache_key = CacheManager.generate_key('similar', recipe_id=recipe_id)
+    cached = cache.get(cache_key)
+
+    if cached is None:
+        cached = similarity_engine.find_similar(recipe_id=recipe_id, limit=50, min_score=0.0)
+        cache.set(cache_key, cached, ttl=3600)
+
+    return [r for r in cached if r['similarity_score'] >= min_score][:limit]
+
+
+def _cached_meal_plan(days, preferences, nutrition_goals, meals_per_day,
+                      variety_weight, force_refresh=False):
+    """
+    Generate a meal plan, reusing a recent one for identical parameters.
+
+    The recipe corpus is static, so plans for the same (days, preferences,
+    goals, meals, variety) tuple can be served from cache instead of
+    re-running the candidate queries and selection loop. A short lock
+    keeps concurrent identical requests from regenerating the same plan
+    (cache stampede protection); force_refresh bypasses the cached copy.
+    """
+    cache_key = CacheManager.generate_key(
+        'meal_plan',
+        days=days,
+        meals=meals_per_day,
+        variety=variety_weight,
+        prefs=json.dumps(preferences or {}, sort_keys=True),
+        goals=json.dumps(nutrition_goals or {}, sort_keys=True)
+    )
+
+    if not force_refresh:
+        cached = cache.get(cache_key)
+        if cached:
+            return cached
+
+        lock_key = cache_key + ':lock'
+        if not cache.acquire_lock(lock_key, ttl=10):
+            for _ in range(50):
+                time.sleep(0.2)
+                cached = cache.get(cache_key)
+                if cached:
+                    return cached
+            # Lock holder took too long; fall through and compute ourselves
+
+    result = meal_planner.generate_meal_plan(
+        days=days,
+        preferences=preferences,
+        nutrition_goals=nutrition_goals,
+        meals_per_day=meals_per_day,
+        variety_weight=variety_weight
+    )
+
+    cache.set(cache_key, result, ttl=3600)
+    return result
+
 
 def init_features_routes():
     """Initialize the features routes."""
@@ -66,26 +137,22 @@ def get_similar_recipes(recipe_id: int):
                 'error': 'min_score must be between 0 and 1'
             }), 400
         
-        # Find similar recipes
-        similar = similarity_engine.find_similar(
-            recipe_id=recipe_id,
-            limit=limit,
-            min_score=min_score
-        )
+        # Find similar recipes (cached per recipe id)
+        similar = _similar_recipes(recipe_id, limit, min_score)
         
         if not similar:
-            return jsonify({
+            return json_response({
                 'recipe_id': recipe_id,
                 'similar_recipes': [],
                 'count': 0,
                 'message': 'No similar recipes found. Try lowering min_score.'
-            }), 200
+            })
         
-        return jsonify({
+        return json_response({
             'recipe_id': recipe_id,
             'similar_recipes': similar,
             'count': len(similar)
-        }), 200
+        })
         
     except ValueError as e:
         return jsonify({
@@ -167,6 +234,7 @@ def generate_meal_plan():
         preferences = data.get('preferences', {})
         nutrition_goals = data.get('nutrition_goals')
         variety_weight = data.get('variety_weight', 0.7)
+        force_refresh = bool(data.get('force_refresh', False))
         
         # Validate
         if not isinstance(days, int) or days < 1 or days > 7:
@@ -184,16 +252,17 @@ def generate_meal_plan():
                 'error': 'variety_weight must be a number between 0 and 1'
             }), 400
         
-        # Generate meal plan
-        meal_plan_result = meal_planner.generate_meal_plan(
+        # Generate meal plan (cached per parameter hash)
+        meal_plan_result = _cached_meal_plan(
             days=days,
             preferences=preferences,
             nutrition_goals=nutrition_goals,
             meals_per_day=meals_per_day,
-            variety_weight=variety_weight
+            variety_weight=variety_weight,
+            force_refresh=force_refresh
         )
-        
-        return jsonify(meal_plan_result), 200
+
+        return json_response(meal_plan_result)
         
     except Exception as e:
         return jsonify({
@@ -237,16 +306,16 @@ def quick_meal_plan():
         else:  # balanced
             nutrition_goals['protein'] = 75
         
-        # Generate 3-day plan
-        meal_plan_result = meal_planner.generate_meal_plan(
+        # Generate 3-day plan (cached per parameter hash)
+        meal_plan_result = _cached_meal_plan(
             days=3,
             preferences=preferences,
             nutrition_goals=nutrition_goals,
             meals_per_day=3,
             variety_weight=0.7
         )
-        
-        return jsonify(meal_plan_result), 200
+
+        return json_response(meal_plan_result)
         
     except ValueError as e:
         return jsonify({
@@ -3,8 +3,27 @@ Recipe API Routes
 Handles individual recipe and listing endpoints
 """
 
-import random
-from flask import Blueprint, request, jsonify
+from collections import Counter
+from functools import lru_cache
+from itertools import chain
+
+import numpy as np
+from flask import Blueprint, request, jsonify, current_app
+from sqlalchemy import bindparam, func, select, text
+
+from config.settings import USE_DATABASE
+from config.vocabulary import COMMON_INGREDIENTS
+from core.models import get_session, Recipe
+from utils.fastjson import dumps_bytes, json_response
+
+# Shared RNG for /random sampling (NumPy draws without replacement in C)
+_rng = np.random.default_rng()
+
+# /ingredients payload is constant: encode it once at import time
+_INGREDIENTS_BODY = dumps_bytes({
+    'total_ingredients': len(COMMON_INGREDIENTS),
+    'ingredients': COMMON_INGREDIENTS[:100]
+})
 
 # Will be injected by app
 recipes = None
@@ -12,104 +31,152 @@ recipe_matcher = None
 
 recipe_bp = Blueprint('recipes', __name__)
 
+# Prepared Core SELECT for DB-mode recipe lookups
+_recipe_select = select(
+    Recipe.id, Recipe.title, Recipe.description,
+    Recipe.categories, Recipe.ingredients, Recipe.directions,
+    Recipe.calories, Recipe.protein, Recipe.fat,
+    Recipe.sodium, Recipe.sugar, Recipe.saturates
+).where(Recipe.id == bindparam('rid'))
+
+# Memoized JSON-mode /categories payload (recipes are immutable after load)
+_categories_payload = None
+
+# JSON-mode recipe id -> list index map (built once at init)
+_id_index = {}
+
+# Cached max recipe id for DB-mode keyset sampling (table is read-only)
+_max_recipe_id = None
+
 
 def init_recipe_routes(recipes_list, matcher):
     """Initialize with recipes and matcher instances."""
-    global recipes, recipe_matcher
+    global recipes, recipe_matcher, _id_index
     recipes = recipes_list
     recipe_matcher = matcher
+    _id_index = {r.get('id', i): i for i, r in enumerate(recipes_list)}
+
+
+@lru_cache(maxsize=4096)
+def _recipe_payload(recipe_id):
+    """
+    Fetch and assemble the API payload for a recipe (database mode).
+
+    Cached by recipe_id: recipe rows are immutable after migration, so
+    hot recipes skip the DB round-trip and dict assembly entirely.
+    """
+    session = get_session()
+    try:
+        row = session.execute(_recipe_select, {'rid': recipe_id}).one_or_none()
+        if row is None:
+            return None
+
+        return {
+            'id': row.id,
+            'recipe': {
+                'title': row.title,
+                'description': row.description or row.title,
+                'categories': row.categories or [],
+                'ingredients': row.ingredients or [],
+                'directions': row.directions or [],
+                'nutrition': {
+                    'calories': row.calories or 0,
+                    'protein': row.protein or 0,
+                    'fat': row.fat or 0,
+                    'sodium': row.sodium or 0,
+                    'sugar': row.sugar or 0,
+                    'saturates': row.saturates or 0
+                }
+            }
+        }
+    finally:
+        session.close()
 
 
 @recipe_bp.route('/recipe/<int:recipe_id>', methods=['GET'])
 def get_recipe(recipe_id):
     """Get a specific recipe by its ID."""
-    from config.settings import USE_DATABASE
-    
     if USE_DATABASE:
-        # Database mode: query by actual ID
-        from core.models import get_session, Recipe
-        session = get_session()
-        try:
-            recipe = session.query(Recipe).filter(Recipe.id == recipe_id).first()
-            if not recipe:
-                return jsonify({'error': 'Recipe not found'}), 404
-            
-            return jsonify({
-                'id': recipe.id,
-                'recipe': {
-                    'title': recipe.title,
-                    'description': recipe.description or recipe.title,
-                    'categories': recipe.categories or [],
-                    'ingredients': recipe.ingredients or [],
-                    'directions': recipe.directions or [],
-                    'nutrition': {
-                        'calories': recipe.calories or 0,
-                        'protein': recipe.protein or 0,
-                        'fat': recipe.fat or 0,
-                        'sodium': recipe.sodium or 0,
-                        'sugar': recipe.sugar or 0,
-                        'saturates': recipe.saturates or 0
-                    }
-                }
-            })
-        finally:
-            session.close()
+        # Database mode: prepared Core select + per-id payload cache
+        payload = _recipe_payload(recipe_id)
+        if payload is None:
+            return jsonify({'error': 'Recipe not found'}), 404
+        return json_response(payload)
     else:
-        # JSON mode: find by id field in recipe dict
-        for recipe in recipes:
-            if recipe.get('id') == recipe_id:
-                return jsonify({
-                    'id': recipe_id,
-                    'recipe': {
-                        'title': recipe.get('title', 'Untitled'),
-                        'description': recipe.get('desc', recipe.get('title', '')),
-                        'categories': recipe.get('categories', []),
-                        'ingredients': recipe.get('ingredients', []),
-                        'directions': recipe.get('directions', []),
-                        'nutrition': {
-                            'calories': recipe.get('calories', 0),
-                            'protein': recipe.get('protein', 0),
-                            'fat': recipe.get('fat', 0),
-                            'sodium': recipe.get('sodium', 0),
-                            'sugar': recipe.get('sugar', 0),
-                            'saturates': recipe.get('saturates', 0)
-                        },
-                        'rating': recipe.get('rating'),
-                        'url': recipe.get('url')
-                    }
-                })
-        
-        return jsonify({'error': 'Recipe not found'}), 404
+        # JSON mode: O(1) lookup via the precomputed id -> index map
+        idx = _id_index.get(recipe_id)
+        if idx is None:
+            return jsonify({'error': 'Recipe not found'}), 404
+
+        recipe = recipes[idx]
+        return json_response({
+            'id': recipe_id,
+            'recipe': {
+                'title': recipe.get('title', 'Untitled'),
+                'description': recipe.get('desc', recipe.get('title', '')),
+                'categories': recipe.get('categories', []),
+                'ingredients': recipe.get('ingredients', []),
+                'directions': recipe.get('directions', []),
+                'nutrition': {
+                    'calories': recipe.get('calories', 0),
+                    'protein': recipe.get('protein', 0),
+                    'fat': recipe.get('fat', 0),
+                    'sodium': recipe.get('sodium', 0),
+                    'sugar': recipe.get('sugar', 0),
+                    'saturates': recipe.get('saturates', 0)
+                },
+                'rating': recipe.get('rating'),
+                'url': recipe.get('url')
+            }
+        })
 
 
 @recipe_bp.route('/random', methods=['GET'])
 def random_recipes():
     """Get random recipes."""
-    from config.settings import USE_DATABASE
-    
     count = int(request.args.get('count', 5))
     count = min(count, 50)  # Limit to 50
-    
+
     if USE_DATABASE:
-        # Database mode: use SQL random
-        from core.models import get_session, Recipe
-        from sqlalchemy.sql.expression import func
-        
         session = get_session()
         try:
-            random_recipes = session.query(Recipe).order_by(func.random()).limit(count).all()
-            
-            results = []
-            for recipe in random_recipes:
-                results.append({
-                    'id': recipe.id,
-                    'title': recipe.title,
-                    'categories': recipe.categories or [],
-                    'calories': recipe.calories,
-                    'protein': recipe.protein
-                })
-            
-            return jsonify({
+            # Keyset sampling: ids are sequential after migration, so drawing
+            # random ids and fetching by primary key avoids the full-table
+            # sort that ORDER BY random() forces.
+            global _max_recipe_id
+            if _max_recipe_id is None:
+                _max_recipe_id = session.query(func.max(Recipe.id)).scalar() or 0
+
+            # Column-only query: skips ORM hydration and identity-map
+            # bookkeeping, and only ships the 5 fields the payload needs.
+            columns = session.query(
+                Recipe.id, Recipe.title, Recipe.categories,
+                Recipe.calories, Recipe.protein
+            )
+
+            rows = []
+            if _max_recipe_id:
+                # Oversample 2x to tolerate gaps in the id space
+                sample_size = min(count * 2, _max_recipe_id)
+                sample_ids = (_rng.choice(_max_recipe_id, size=sample_size, replace=False) + 1).tolist()
+                rows = columns.filter(Recipe.id.in_(sample_ids)).limit(count).all()
+
+            if len(rows) < count:
+                # Sparse id space (or tiny table): fall back to a random sort
+                rows = columns.order_by(func.random()).limit(count).all()
+
+            results = [
+                {
+                    'id': row.id,
+                    'title': row.title,
+                    'categories': row.categories or [],
+                    'calories': row.calories,
+                    'protein': row.protein
+                }
+                for row in rows
+            ]
+
+            return json_response({
                 'count': len(results),
                 'recipes': results
             })
@@ -117,7 +184,7 @@ def random_recipes():
             session.close()
     else:
         # JSON mode
-        indices = random.sample(range(len(recipes)), min(count, len(recipes)))
+        indices = _rng.choice(len(recipes), size=min(count, len(recipes)), replace=False).tolist()
         
         results = []
         for idx in indices:
@@ -130,7 +197,7 @@ def random_recipes():
                 'protein': recipe.get('protein')
             })
         
-        return jsonify({
+        return json_response({
             'count': len(results),
             'recipes': results
         })
@@ -139,53 +206,50 @@ def random_recipes():
 @recipe_bp.route('/categories', methods=['GET'])
 def list_categories():
     """List all available categories."""
-    from config.settings import USE_DATABASE
-    
     if USE_DATABASE:
-        # Database mode: query categories directly
-        from core.models import get_session, Recipe
-        from sqlalchemy import func
-        
         session = get_session()
         try:
-            # Use unnest to expand arrays and count
-            from sqlalchemy import text
-            result = session.execute(text("""
-                SELECT category, COUNT(*) as count
-                FROM recipes, unnest(categories) AS category
-                GROUP BY category
-                ORDER BY count DESC
-            """))
-            
+            try:
+                # Precomputed at migration time (see migrate_to_postgres.py)
+                result = session.execute(text("""
+                    SELECT category, count
+                    FROM recipe_category_counts
+                    ORDER BY count DESC
+                """))
+            except Exception:
+                # Materialized view missing (older migration): aggregate live
+                session.rollback()
+                result = session.execute(text("""
+                    SELECT category, COUNT(*) as count
+                    FROM recipes, unnest(categories) AS category
+                    GROUP BY category
+                    ORDER BY count DESC
+                """))
+
             categories = [{'name': row[0], 'count': row[1]} for row in result]
             
-            return jsonify({
+            return json_response({
                 'total_categories': len(categories),
                 'categories': categories
             })
         finally:
             session.close()
     else:
-        # JSON mode
-        categories = {}
-        for recipe in recipes:
-            for cat in recipe.get('categories', []):
-                categories[cat] = categories.get(cat, 0) + 1
-        
-        sorted_categories = sorted(categories.items(), key=lambda x: x[1], reverse=True)
-        
-        return jsonify({
-            'total_categories': len(sorted_categories),
-            'categories': [{'name': cat, 'count': count} for cat, count in sorted_categories]
-        })
+        # JSON mode: count in C via Counter, memoize (recipes never change)
+        global _categories_payload
+        if _categories_payload is None:
+            counts = Counter(chain.from_iterable(
+                recipe.get('categories') or () for recipe in recipes
+            ))
+            _categories_payload = {
+                'total_categories': len(counts),
+                'categories': [{'name': cat, 'count': count} for cat, count in counts.most_common()]
+            }
+
+        return json_response(_categories_payload)
 
 
 @recipe_bp.route('/ingredients', methods=['GET'])
 def list_ingredients():
     """List common ingredients recognized by the system."""
-    from config.vocabulary import COMMON_INGREDIENTS
-    
-    return jsonify({
-        'total_ingredients': len(COMMON_INGREDIENTS),
-        'ingredients': COMMON_INGREDIENTS[:100]
-    })
+    return current_app.response_class(_INGREDIENTS_BODY, mimetype='application/json')
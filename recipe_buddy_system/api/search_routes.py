@@ -7,6 +7,7 @@ import time
 import os
 from flask import Blueprint, request, jsonify
 from core.cache import get_cache_manager, CacheManager
+from utils.fastjson import json_response
 
 # Will be injected by app
 query_parser = None
@@ -37,18 +38,50 @@ def search():
         "page": 1,
         "use_tfidf": true
     }
+
+    Batch mode: pass "queries": ["...", ...] (up to 32) instead of "query"
+    to score all queries against the TF-IDF index in one pass.
     """
     start_time = time.time()
-    
+
     data = request.get_json()
-    if not data or 'query' not in data:
+    if not data or ('query' not in data and 'queries' not in data):
         return jsonify({'error': 'Missing query parameter'}), 400
-    
-    query = data['query']
+
     max_results = min(data.get('max_results', 20), 100)  # Cap at 100
     page = max(data.get('page', 1), 1)  # Minimum page 1
     use_tfidf = data.get('use_tfidf', True)
-    
+
+    # Batch mode: one vectorized matcher call for all queries
+    if 'queries' in data:
+        queries = data['queries']
+        if not isinstance(queries, list) or not queries:
+            return jsonify({'error': 'queries must be a non-empty list'}), 400
+
+        queries = [str(q) for q in queries[:32]]  # Cap batch size
+        parsed_queries = [query_parser.parse(q) for q in queries]
+        batch_results = recipe_matcher.search_batch(
+            parsed_queries, max_results=max_results, use_tfidf=use_tfidf
+        )
+
+        query_time = (time.time() - start_time) * 1000
+
+        return json_response({
+            'batch': True,
+            'query_time_ms': round(query_time, 2),
+            'queries': [
+                {
+                    'query': q,
+                    'parsed_query': pq,
+                    'results_count': len(res),
+                    'results': res
+                }
+                for q, pq, res in zip(queries, parsed_queries, batch_results)
+            ]
+        })
+
+    query = data['query']
+
     # Calculate offset for database-level pagination
     offset = (page - 1) * max_results
     
@@ -67,7 +100,7 @@ def search():
     # For now, we indicate if there's potentially more data
     has_next = len(results) == max_results  # If we got full page, there might be more
     
-    return jsonify({
+    return json_response({
         'query': query,
         'parsed_query': parsed_query,
         'results_count': len(results),
@@ -106,37 +139,59 @@ def search_simple():
     
     if cached_result:
         cached_result['cached'] = True
-        return jsonify(cached_result)
-    
-    # Calculate offset for database-level pagination
-    offset = (page - 1) * limit
-    
-    parsed_query = query_parser.parse(query)
-    
-    # Search with proper pagination
-    results = recipe_matcher.search(parsed_query, max_results=limit, offset=offset)
-    
-    query_time = (time.time() - start_time) * 1000
-    
-    # Indicate if there's potentially more data
-    has_next = len(results) == limit
-    
-    response = {
-        'query': query,
-        'results_count': len(results),
-        'page': page,
-        'per_page': limit,
-        'has_next': has_next,
-        'has_prev': page > 1,
-        'query_time_ms': round(query_time, 2),
-        'results': results,
-        'cached': False
-    }
-    
-    # Cache for 5 minutes (300 seconds)
-    cache.set(cache_key, response, ttl=300)
-    
-    return jsonify(response)
+        return json_response(cached_result)
+
+    # Single-flight: only one worker computes a missed query; concurrent
+    # identical requests poll the result cache instead of duplicating the
+    # parse + search work (cache stampede protection).
+    lock_key = cache_key + ':lock'
+    acquired = cache.acquire_lock(lock_key, ttl=5)
+    if not acquired:
+        for _ in range(20):
+            time.sleep(0.1)
+            cached_result = cache.get(cache_key)
+            if cached_result:
+                cached_result['cached'] = True
+                return json_response(cached_result)
+        # Lock holder took too long; fall through and compute ourselves
+        # (without the lock — releasing it is the holder's job)
+
+    try:
+        # Calculate offset for database-level pagination
+        offset = (page - 1) * limit
+
+        parsed_query = query_parser.parse(query)
+
+        # Search with proper pagination
+        results = recipe_matcher.search(parsed_query, max_results=limit, offset=offset)
+
+        query_time = (time.time() - start_time) * 1000
+
+        # Indicate if there's potentially more data
+        has_next = len(results) == limit
+
+        response = {
+            'query': query,
+            'results_count': len(results),
+            'page': page,
+            'per_page': limit,
+            'has_next': has_next,
+            'has_prev': page > 1,
+            'query_time_ms': round(query_time, 2),
+            'results': results,
+            'cached': False
+        }
+
+        # Cache for 5 minutes (300 seconds)
+        cache.set(cache_key, response, ttl=300)
+    finally:
+        # Only the worker that took the lock may delete it; a timed-out
+        # poller releasing here would unlock the current holder (or a
+        # later request's fresh lock) and re-open the stampede window
+        if acquired:
+            cache.release_lock(lock_key)
+
+    return json_response(response)
 
 
 @search_bp.route('/parse', methods=['POST'])
@@ -156,7 +211,7 @@ def parse_query():
     query = data['query']
     parsed = query_parser.parse(query)
     
-    return jsonify({
+    return json_response({
         'query': query,
         'parsed': parsed
     })
@@ -3,10 +3,11 @@ System API Routes
 Handles health check, stats, and documentation endpoints
 """
 
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, current_app
 
 from config.settings import API_NAME, API_VERSION
 from core.cache import get_cache_manager
+from utils.fastjson import dumps_bytes, json_response
 
 # Will be injected by app
 recipes = None
@@ -14,16 +15,39 @@ query_parser = None
 recipe_matcher = None
 cache = get_cache_manager()
 
+# Pre-serialized /stats payload (the dataset never changes at runtime)
+_stats_body = None
+
 
 system_bp = Blueprint('system', __name__)
 
 
 def init_system_routes(recipes_list, parser, matcher):
     """Initialize with app instances."""
-    global recipes, query_parser, recipe_matcher
+    global recipes, query_parser, recipe_matcher, _stats_body
     recipes = recipes_list
     query_parser = parser
     recipe_matcher = matcher
+    _stats_body = _build_stats_body()
+
+
+def _build_stats_body():
+    """Serialize the /stats payload once at startup."""
+    from config.settings import USE_DATABASE
+
+    if USE_DATABASE:
+        return dumps_bytes({
+            'total_recipes': recipe_matcher.metadata.get('total_recipes', 0) if recipe_matcher else 0,
+            'source': 'postgresql',
+            'mode': 'database (lazy-load)',
+            'features': ['semantic_search', 'nutrition_filtering', 'fuzzy_matching']
+        })
+
+    if not recipes:
+        return None
+
+    from core.data_loader import get_recipe_stats
+    return dumps_bytes(get_recipe_stats(recipes))
 
 
 @system_bp.route('/', methods=['GET'])
@@ -32,7 +56,7 @@ def home():
     # Get count from metadata or recipes list
     total_count = recipe_matcher.metadata.get('total_recipes', 0) if recipe_matcher else len(recipes)
     
-    return jsonify({
+    return json_response({
         'name': API_NAME,
         'version': API_VERSION,
         'description': 'Intelligent Halal Recipe Search with NLP and ML',
@@ -69,7 +93,7 @@ def health():
     """Health check endpoint."""
     total_count = recipe_matcher.metadata.get('total_recipes', 0) if recipe_matcher else len(recipes)
     
-    return jsonify({
+    return json_response({
         'status': 'healthy',
         'recipes_loaded': total_count,
         'database_mode': recipe_matcher.use_database if recipe_matcher else False,
@@ -80,25 +104,11 @@ def health():
 
 @system_bp.route('/stats', methods=['GET'])
 def stats():
-    """Get dataset statistics."""
-    from config.settings import USE_DATABASE
-    
-    if USE_DATABASE:
-        # Database mode: get stats from metadata
-        return jsonify({
-            'total_recipes': recipe_matcher.metadata.get('total_recipes', 0),
-            'source': 'postgresql',
-            'mode': 'database (lazy-load)',
-            'features': ['semantic_search', 'nutrition_filtering', 'fuzzy_matching']
-        })
-    else:
-        # JSON mode: compute stats from loaded recipes
-        from core.data_loader import get_recipe_stats
-        
-        if not recipes:
-            return jsonify({'error': 'Recipes not loaded'}), 500
-        
-        return jsonify(get_recipe_stats(recipes))
+    """Get dataset statistics (pre-serialized at startup)."""
+    if _stats_body is None:
+        return jsonify({'error': 'Recipes not loaded'}), 500
+
+    return current_app.response_class(_stats_body, mimetype='application/json')
 
 
 @system_bp.route('/cache/stats', methods=['GET'])
@@ -106,7 +116,7 @@ def cache_stats():
     """Get cache statistics."""
     stats = cache.get_stats()
     
-    return jsonify({
+    return json_response({
         'cache': stats,
         'description': {
             'hits': 'Number of successful cache retrievals',
@@ -13,7 +13,7 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from flask import Flask
 from flask_cors import CORS
 
-from config.settings import DEBUG, HOST, PORT, API_NAME, API_VERSION
+from config.settings import DEBUG, HOST, PORT, API_NAME, API_VERSION, USE_DATABASE
 from core import load_recipes, QueryParser, RecipeMatcher
 from api import (
     search_bp, init_search_routes,
@@ -43,7 +43,16 @@ def create_app():
     
     # Register error handlers
     register_error_handlers(app)
-    
+
+    # Release the thread-local DB session at the end of each request so
+    # all queries within a request share one session and identity map
+    if USE_DATABASE:
+        from core.models import remove_session
+
+        @app.teardown_appcontext
+        def shutdown_session(exception=None):
+            remove_session()
+
     return app
 
 
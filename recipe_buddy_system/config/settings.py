@@ -27,6 +27,10 @@ TFIDF_NGRAM_RANGE = (1, 1)
 TFIDF_MIN_DF = 10
 TFIDF_MAX_DF = 0.5
 
+# BM25 term weighting (in-memory semantic scoring)
+BM25_K1 = 1.5   # Term-frequency saturation
+BM25_B = 0.75   # Document-length normalization
+
 # Scoring weights (V2 Hybrid)
 RULE_BASED_WEIGHT = 0.7  # 70% rule-based
 TFIDF_WEIGHT = 0.3       # 30% TF-IDF
@@ -2,6 +2,8 @@
 Food vocabulary and keywords database
 """
 
+import re
+
 # Negation keywords for understanding exclusions
 NEGATION_WORDS = {
     'without', 'no', 'avoid', 'exclude', 'not', "don't", 'dont', "doesn't", 'doesnt',
@@ -142,3 +144,117 @@ SPELL_CHECK_WORDS = [
     'vegetarian', 'vegan', 'halal', 'spicy', 'sweet', 'savory',
     'breakfast', 'lunch', 'dinner', 'dessert', 'snack'
 ]
+
+
+# ---------------------------------------------------------------------------
+# Derived lookup structures (built once at import time)
+#
+# The lists above stay as the editable source of truth; parsing code should
+# use these O(1) sets and the single-pass scanner below instead of scanning
+# the lists per token.
+# ---------------------------------------------------------------------------
+
+# Negation lookups: O(1) membership for single tokens, one compiled
+# word-bounded pass for the multi-word phrases ('but no', 'leave out', ...)
+NEGATION_SINGLE = frozenset(w for w in NEGATION_WORDS if ' ' not in w)
+NEGATION_MULTI_RE = re.compile(r'\b(' + '|'.join(
+    re.escape(w) for w in sorted(
+        (w for w in NEGATION_WORDS if ' ' in w), key=len, reverse=True
+    )
+) + r')\b')
+
+INGREDIENT_SET = frozenset(COMMON_INGREDIENTS)
+DISH_SET = frozenset(DISH_NAMES)
+SPELL_SET = frozenset(SPELL_CHECK_WORDS)
+
+# keyword -> canonical label, one dict per vocabulary bucket
+MEAL_INDEX = {kw: meal for meal, kws in MEAL_TYPES.items() for kw in kws}
+CATEGORY_INDEX = {kw: cat for cat, kws in FOOD_CATEGORIES.items() for kw in kws}
+NUTRITION_INDEX = {kw: nut for nut, kws in NUTRITION_KEYWORDS.items() for kw in kws}
+
+
+def _build_pattern(bucket):
+    """
+    Compile one keyword dict into a single word-bounded alternation.
+
+    The regex engine scans the query once for all keywords, replacing the
+    nested per-category/per-keyword substring loops. Longest-first
+    ordering makes 'gluten-free' win over 'free'.
+    """
+    alternation = '|'.join(sorted(
+        (re.escape(kw) for kws in bucket.values() for kw in kws),
+        key=len, reverse=True
+    ))
+    return re.compile(r'\b(' + alternation + r')\b')
+
+
+MEAL_RE = _build_pattern(MEAL_TYPES)
+CATEGORY_RE = _build_pattern(FOOD_CATEGORIES)
+NUTRITION_RE = _build_pattern(NUTRITION_KEYWORDS)
+
+
+def build_spell_trie():
+    """
+    Build a character trie over SPELL_CHECK_WORDS for the spell corrector.
+
+    Nodes are nested dicts keyed by character; a '$' key marks a complete
+    word. Edit-distance lookups walk the trie and prune whole subtrees,
+    instead of computing Levenshtein against every dictionary word.
+    """
+    trie = {}
+    for word in SPELL_CHECK_WORDS:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node['$'] = True
+    return trie
+
+
+def _build_scan_index():
+    """
+    Build the combined keyword table for scan(): keyword -> ((bucket,
+    canonical), ...). A keyword can live in several buckets (e.g. 'pasta'
+    is a category keyword, an ingredient and a dish name).
+    """
+    index = {}
+
+    def add(keyword, bucket, canonical):
+        index.setdefault(keyword, []).append((bucket, canonical))
+
+    for kw, meal in MEAL_INDEX.items():
+        add(kw, 'meal_type', meal)
+    for kw, cat in CATEGORY_INDEX.items():
+        add(kw, 'category', cat)
+    for kw, nut in NUTRITION_INDEX.items():
+        add(kw, 'nutrition', nut)
+    for kw in COMMON_INGREDIENTS:
+        add(kw, 'ingredient', kw)
+    for kw in DISH_NAMES:
+        add(kw, 'dish', kw)
+
+    return {kw: tuple(hits) for kw, hits in index.items()}
+
+
+_SCAN_INDEX = _build_scan_index()
+
+# One alternation over the whole vocabulary: the regex engine walks the
+# query once instead of one substring scan per keyword. Longest-first
+# ordering makes 'chicken breast' win over 'chicken'.
+_SCAN_RE = re.compile(
+    r'\b(' + '|'.join(
+        re.escape(kw) for kw in sorted(_SCAN_INDEX, key=len, reverse=True)
+    ) + r')\b'
+)
+
+
+def scan(text):
+    """
+    Scan text for all vocabulary terms in a single pass.
+
+    Yields (end_index, bucket, canonical) tuples, where bucket is one of
+    'meal_type', 'category', 'nutrition', 'ingredient', 'dish'.
+    """
+    for match in _SCAN_RE.finditer(text.lower()):
+        end = match.end(1)
+        for bucket, canonical in _SCAN_INDEX[match.group(1)]:
+            yield end, bucket, canonical
@@ -1,6 +1,30 @@
-"""Core module initialization"""
-from .spell_corrector import SpellCorrector
-from .query_parser import QueryParser
-from .recipe_matcher import RecipeMatcher
-from .data_loader import load_recipes, get_recipe_stats, get_recipe_by_id, search_recipes_db
-from .models import Recipe, get_session, get_engine, init_db
+"""Core module initialization (lazy re-exports)"""
+import importlib
+
+# name -> submodule, resolved on first attribute access (PEP 562) so code
+# that only needs e.g. the cache doesn't pay for spaCy or engine creation
+_lazy = {
+    'SpellCorrector': 'spell_corrector',
+    'QueryParser': 'query_parser',
+    'RecipeMatcher': 'recipe_matcher',
+    'load_recipes': 'data_loader',
+    'get_recipe_stats': 'data_loader',
+    'get_recipe_by_id': 'data_loader',
+    'get_recipes_by_ids': 'data_loader',
+    'search_recipes_db': 'data_loader',
+    'Recipe': 'models',
+    'get_session': 'models',
+    'get_engine': 'models',
+    'init_db': 'models',
+}
+
+__all__ = list(_lazy)
+
+
+def __getattr__(name):
+    if name in _lazy:
+        module = importlib.import_module('.' + _lazy[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -3,12 +3,16 @@ Caching Layer for Recipe Buddy
 Supports both Redis and in-memory caching
 """
 
-import json
 import hashlib
+import heapq
+import time
+import zlib
+from collections import OrderedDict
 from typing import Any, Optional
-from datetime import datetime, timedelta
 from functools import wraps
 
+from utils.fastjson import dumps_bytes, loads
+
 
 class CacheManager:
     """
@@ -19,8 +23,16 @@ class CacheManager:
     - In-memory fallback when Redis unavailable
     - TTL support
     - Cache key generation
+    - Transparent compression of large Redis payloads
     """
-    
+
+    # Redis values above this size are zlib-compressed before storage
+    COMPRESS_MIN_BYTES = 4096
+    _COMPRESS_PREFIX = b'zlib\x00'
+
+    # In-memory cache entry cap (least-recently-used entries evicted first)
+    MEMORY_MAX_ENTRIES = 1000
+
     def __init__(self, redis_url: Optional[str] = None, default_ttl: int = 3600):
         """
         Initialize cache manager.
@@ -31,7 +43,8 @@ class CacheManager:
         """
         self.default_ttl = default_ttl
         self.redis_client = None
-        self.memory_cache = {}
+        self.memory_cache = OrderedDict()  # key -> (value, expires_at)
+        self._expiry = []  # min-heap of (expires_at, key) for TTL cleanup
         self.cache_stats = {'hits': 0, 'misses': 0, 'sets': 0}
         
         # Try to connect to Redis
@@ -40,7 +53,7 @@ class CacheManager:
                 import redis
                 self.redis_client = redis.from_url(
                     redis_url,
-                    decode_responses=True,
+                    decode_responses=False,  # Raw bytes: payloads may be compressed
                     socket_connect_timeout=2
                 )
                 # Test connection
@@ -52,6 +65,21 @@ class CacheManager:
         else:
             print("✅ Using in-memory cache (set REDIS_URL for Redis)")
     
+    def _serialize(self, value: Any) -> bytes:
+        """Serialize a value for Redis, compressing large payloads."""
+        data = dumps_bytes(value)
+        if len(data) > self.COMPRESS_MIN_BYTES:
+            data = self._COMPRESS_PREFIX + zlib.compress(data, level=1)
+        return data
+
+    def _deserialize(self, data) -> Any:
+        """Deserialize a Redis value, decompressing if needed."""
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        if data.startswith(self._COMPRESS_PREFIX):
+            data = zlib.decompress(data[len(self._COMPRESS_PREFIX):])
+        return loads(data)
+
     def get(self, key: str) -> Optional[Any]:
         """Get value from cache."""
         try:
@@ -60,26 +88,25 @@ class CacheManager:
                 value = self.redis_client.get(key)
                 if value:
                     self.cache_stats['hits'] += 1
-                    return json.loads(value)
+                    return self._deserialize(value)
                 else:
                     self.cache_stats['misses'] += 1
                     return None
             else:
                 # Use memory cache
-                if key in self.memory_cache:
-                    entry = self.memory_cache[key]
-                    # Check if expired
-                    if entry['expires_at'] > datetime.now():
+                self._drain_expired()
+                entry = self.memory_cache.get(key)
+                if entry is not None:
+                    value, expires_at = entry
+                    if expires_at > time.monotonic():
+                        # Refresh LRU position on hit
+                        self.memory_cache.move_to_end(key)
                         self.cache_stats['hits'] += 1
-                        return entry['value']
-                    else:
-                        # Expired, remove
-                        del self.memory_cache[key]
-                        self.cache_stats['misses'] += 1
-                        return None
-                else:
-                    self.cache_stats['misses'] += 1
-                    return None
+                        return value
+                    # Expired, remove
+                    del self.memory_cache[key]
+                self.cache_stats['misses'] += 1
+                return None
         except Exception as e:
             print(f"Cache get error: {e}")
             self.cache_stats['misses'] += 1
@@ -95,18 +122,11 @@ class CacheManager:
                 self.redis_client.setex(
                     key,
                     ttl,
-                    json.dumps(value)
+                    self._serialize(value)
                 )
             else:
-                # Use memory cache
-                self.memory_cache[key] = {
-                    'value': value,
-                    'expires_at': datetime.now() + timedelta(seconds=ttl)
-                }
-                
-                # Clean up expired entries (max 1000 entries)
-                if len(self.memory_cache) > 1000:
-                    self._cleanup_memory_cache()
+                # Use memory cache (LRU: newest entries at the end)
+                self._store_memory(key, value, ttl)
             
             self.cache_stats['sets'] += 1
             return True
@@ -115,6 +135,55 @@ class CacheManager:
             print(f"Cache set error: {e}")
             return False
     
+    def mget(self, keys) -> list:
+        """
+        Get many values in one round-trip.
+
+        Uses Redis MGET so an N-key lookup costs one network round-trip
+        instead of N. Returns a list aligned with keys (None on miss).
+        """
+        try:
+            if self.redis_client:
+                values = self.redis_client.mget(keys)
+                results = []
+                for value in values:
+                    if value:
+                        self.cache_stats['hits'] += 1
+                        results.append(self._deserialize(value))
+                    else:
+                        self.cache_stats['misses'] += 1
+                        results.append(None)
+                return results
+            return [self.get(key) for key in keys]
+        except Exception as e:
+            print(f"Cache mget error: {e}")
+            self.cache_stats['misses'] += len(keys)
+            return [None] * len(keys)
+
+    def mset(self, items: dict, ttl: Optional[int] = None) -> bool:
+        """
+        Set many key -> value pairs in one round-trip.
+
+        Pipelines SETEX commands (no transaction) so N writes share a
+        single round-trip to Redis.
+        """
+        try:
+            ttl = ttl or self.default_ttl
+
+            if self.redis_client:
+                pipe = self.redis_client.pipeline(transaction=False)
+                for key, value in items.items():
+                    pipe.setex(key, ttl, self._serialize(value))
+                pipe.execute()
+                self.cache_stats['sets'] += len(items)
+            else:
+                for key, value in items.items():
+                    self.set(key, value, ttl=ttl)
+            return True
+        except Exception as e:
+            print(f"Cache mset error: {e}")
+            return False
+
     def delete(self, key: str) -> bool:
         """Delete key from cache."""
         try:
@@ -128,6 +197,30 @@ class CacheManager:
             print(f"Cache delete error: {e}")
             return False
     
+    def acquire_lock(self, key: str, ttl: int = 5) -> bool:
+        """
+        Try to acquire a short-lived lock key (for cache stampede protection).
+
+        Returns True if this caller acquired the lock. Fails open on errors
+        so callers compute rather than block.
+        """
+        try:
+            if self.redis_client:
+                return bool(self.redis_client.set(key, 1, nx=True, ex=ttl))
+            else:
+                entry = self.memory_cache.get(key)
+                if entry is not None and entry[1] > time.monotonic():
+                    return False
+                self._store_memory(key, 1, ttl)
+                return True
+        except Exception as e:
+            print(f"Cache lock error: {e}")
+            return True
+
+    def release_lock(self, key: str) -> bool:
+        """Release a lock acquired with acquire_lock."""
+        return self.delete(key)
+
     def clear(self) -> bool:
         """Clear all cache entries."""
         try:
@@ -135,21 +228,37 @@ class CacheManager:
                 self.redis_client.flushdb()
             else:
                 self.memory_cache.clear()
+                self._expiry.clear()
             return True
         except Exception as e:
             print(f"Cache clear error: {e}")
             return False
     
-    def _cleanup_memory_cache(self):
-        """Remove expired entries from memory cache."""
-        now = datetime.now()
-        expired_keys = [
-            k for k, v in self.memory_cache.items()
-            if v['expires_at'] <= now
-        ]
-        for key in expired_keys:
-            del self.memory_cache[key]
-    
+    def _store_memory(self, key, value, ttl):
+        """Insert a memory-cache entry, tracking its TTL in the expiry heap."""
+        expires_at = time.monotonic() + ttl
+        self.memory_cache[key] = (value, expires_at)
+        self.memory_cache.move_to_end(key)
+        heapq.heappush(self._expiry, (expires_at, key))
+
+        # O(1) eviction of the least-recently-used entry
+        if len(self.memory_cache) > self.MEMORY_MAX_ENTRIES:
+            self.memory_cache.popitem(last=False)
+
+    def _drain_expired(self):
+        """
+        Pop expired heap entries and drop their cache rows.
+
+        O(log n) per expired item rather than a full-store sweep; entries
+        whose key was overwritten since (timestamp mismatch) are skipped.
+        """
+        now = time.monotonic()
+        while self._expiry and self._expiry[0][0] <= now:
+            expires_at, key = heapq.heappop(self._expiry)
+            entry = self.memory_cache.get(key)
+            if entry is not None and entry[1] == expires_at:
+                del self.memory_cache[key]
+
     def get_stats(self) -> dict:
         """Get cache statistics."""
         total_requests = self.cache_stats['hits'] + self.cache_stats['misses']
@@ -173,14 +282,11 @@ class CacheManager:
             generate_key('search', query='chicken', limit=10)
             -> 'search:abc123def456'
         """
-        # Combine all arguments
-        key_parts = [str(arg) for arg in args]
-        key_parts.extend([f"{k}={v}" for k, v in sorted(kwargs.items())])
-        key_string = ':'.join(key_parts)
-        
-        # Hash for consistent length
-        key_hash = hashlib.md5(key_string.encode()).hexdigest()[:12]
-        
+        # repr of one compact tuple avoids per-arg string formatting, and
+        # blake2b with a 6-byte digest gives the 12 hex chars directly
+        payload = repr((args, sorted(kwargs.items()))).encode()
+        key_hash = hashlib.blake2b(payload, digest_size=6).hexdigest()
+
         return f"{prefix}:{key_hash}"
 
 
@@ -3,13 +3,41 @@ Data Loader Module
 Handles loading recipe data from PostgreSQL or JSON fallback
 """
 
-import json
 import gzip
 import os
-import gc
+import re
+from contextlib import contextmanager
+from dataclasses import dataclass, field, fields
 from typing import List, Dict, Any, Tuple, Optional
 
+import numpy as np
+
 from config.settings import HALAL_RECIPES_PATH, USE_DATABASE
+from utils.fastjson import loads
+
+
+@contextmanager
+def _session():
+    """Yield a pooled database session, returning it to the pool on exit."""
+    from core.models import get_session
+
+    session = get_session()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def _drain(items: list):
+    """Yield list items while nulling consumed slots to free them early."""
+    for i in range(len(items)):
+        yield items[i]
+        items[i] = None
+
+
+def _prep_and_slim(raw: Dict[str, Any]) -> 'SlimRecipe':
+    """Preprocess and slim one raw recipe (picklable for Pool workers)."""
+    return _slim_recipe(_preprocess_recipe(raw))
 
 
 def load_recipes(path: str = None) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
@@ -27,31 +55,27 @@ def load_recipes(path: str = None) -> Tuple[List[Dict[str, Any]], Dict[str, Any]
 
 def load_recipes_from_db() -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
     """Load recipes from PostgreSQL database."""
-    from core.models import get_session, Recipe
+    from core.models import Recipe
     from sqlalchemy import func
     
     print("Loading recipes from PostgreSQL database...")
     
-    session = get_session()
-    try:
+    with _session() as session:
         # Don't load all recipes - just get count
         # Recipes will be queried on-demand during searches
         count = session.query(func.count(Recipe.id)).scalar()
-        
-        metadata = {
-            'total_recipes': count,
-            'source': 'postgresql',
-            'database': True,
-            'lazy_load': True  # Recipes loaded on-demand
-        }
-        
-        print(f"✅ Connected to database with {count:,} recipes (lazy-load mode)")
-        
-        # Return empty list - recipes will be queried on-demand
-        return [], metadata
-        
-    finally:
-        session.close()
+    
+    metadata = {
+        'total_recipes': count,
+        'source': 'postgresql',
+        'database': True,
+        'lazy_load': True  # Recipes loaded on-demand
+    }
+    
+    print(f"✅ Connected to database with {count:,} recipes (lazy-load mode)")
+    
+    # Return empty list - recipes will be queried on-demand
+    return [], metadata
 
 
 def load_recipes_from_json(path: str = None) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
@@ -68,22 +92,28 @@ def load_recipes_from_json(path: str = None) -> Tuple[List[Dict[str, Any]], Dict
     
     print(f"Loading recipes from JSON: {actual_path}")
     
-    recipes = []
-    
-    if actual_path.endswith('.gz'):
-        with gzip.open(actual_path, 'rt', encoding='utf-8') as f:
-            raw_recipes = json.load(f)
+    opener = gzip.open if actual_path.endswith('.gz') else open
+    with opener(actual_path, 'rb') as f:
+        raw_recipes = loads(f.read())
+
+    # Consume the raw list in place: each parsed recipe is dropped as soon
+    # as it is slimmed (or dispatched to a worker), so peak memory stays
+    # near one copy of the dataset instead of raw + slim held together.
+    workers = os.cpu_count() or 1
+    if workers > 1 and len(raw_recipes) >= 10000:
+        # CPU-bound preprocessing scales across cores; imap (ordered)
+        # keeps list positions stable since JSON-mode ids are positional
+        from multiprocessing import Pool
+
+        with Pool(workers) as pool:
+            recipes = list(pool.imap(
+                _prep_and_slim, _drain(raw_recipes), chunksize=500
+            ))
     else:
-        with open(actual_path, 'r', encoding='utf-8') as f:
-            raw_recipes = json.load(f)
-    
-    for recipe in raw_recipes:
-        processed = _preprocess_recipe(recipe)
-        recipes.append(_slim_recipe(processed))
-    
+        recipes = [_prep_and_slim(raw) for raw in _drain(raw_recipes)]
+
     del raw_recipes
-    gc.collect()
-    
+
     metadata = {
         'total_recipes': len(recipes),
         'source': actual_path,
@@ -98,18 +128,54 @@ def load_recipes_from_json(path: str = None) -> Tuple[List[Dict[str, Any]], Dict
 def get_recipe_by_id(recipe_id: int) -> Optional[Dict[str, Any]]:
     """Get full recipe by ID from database or cache."""
     if USE_DATABASE:
-        from core.models import get_session, Recipe
+        from core.models import Recipe
         
-        session = get_session()
-        try:
+        with _session() as session:
             recipe = session.query(Recipe).filter(Recipe.id == recipe_id).first()
             return recipe.to_dict() if recipe else None
-        finally:
-            session.close()
     
     return None
 
 
+def get_recipes_by_ids(recipe_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    """
+    Fetch full recipes for many ids at once.
+
+    Probes the cache with one mget, fetches all misses in a single IN
+    query, then writes them back with one pipelined mset — at most two
+    round-trips total, instead of one session + SELECT per recipe.
+    """
+    if not recipe_ids or not USE_DATABASE:
+        return {}
+
+    from core.cache import get_cache_manager, CacheManager
+    from core.models import Recipe
+
+    cache = get_cache_manager()
+    keys = [CacheManager.generate_key('recipe', recipe_id=rid) for rid in recipe_ids]
+
+    results = {}
+    misses = []
+    for rid, value in zip(recipe_ids, cache.mget(keys)):
+        if value is not None:
+            results[rid] = value
+        else:
+            misses.append(rid)
+
+    if misses:
+        with _session() as session:
+            rows = session.query(Recipe).filter(Recipe.id.in_(misses)).all()
+
+        fetched = {row.id: row.to_dict() for row in rows}
+        results.update(fetched)
+        cache.mset({
+            CacheManager.generate_key('recipe', recipe_id=rid): recipe
+            for rid, recipe in fetched.items()
+        }, ttl=3600)
+
+    return results
+
+
 def search_recipes_db(
     keywords: List[str] = None,
     excluded: List[str] = None,
@@ -128,96 +194,216 @@ def search_recipes_db(
     """
     if not USE_DATABASE:
         return []
-    
-    from core.models import get_session, Recipe
-    from sqlalchemy import or_, and_, func
-    
-    session = get_session()
-    try:
-        query = session.query(Recipe)
-        
-        # Keyword search in title, ingredients, search_text
-        if keywords:
-            keyword_filters = []
-            for kw in keywords:
-                kw_lower = f"%{kw.lower()}%"
-                keyword_filters.append(
-                    or_(
-                        func.lower(Recipe.title).like(kw_lower),
-                        func.lower(Recipe.search_text).like(kw_lower),
-                        Recipe.ingredients.any(func.lower(func.unnest(Recipe.ingredients)).like(kw_lower))
-                    )
-                )
-            query = query.filter(and_(*keyword_filters))
-        
-        # Exclude ingredients
-        if excluded:
-            for exc in excluded:
-                exc_lower = f"%{exc.lower()}%"
-                query = query.filter(
-                    ~func.lower(Recipe.search_text).like(exc_lower)
+
+    # Keyword search as one full-text match over search_text (which
+    # already folds in title, ingredients and categories). The GIN
+    # index from the migration serves this in one lookup, where the
+    # old per-keyword '%kw%' LIKEs forced sequential scans.
+    terms = []
+    for kw in keywords or []:
+        terms.extend(re.findall(r'\w+', kw.lower()))
+    for exc in excluded or []:
+        terms.extend('!' + token for token in re.findall(r'\w+', exc.lower()))
+
+    shape = (
+        bool(terms),
+        bool(categories),
+        min_calories is not None, max_calories is not None,
+        min_protein is not None, max_protein is not None,
+        min_fat is not None, max_fat is not None,
+    )
+
+    params = {'lim': limit}
+    if terms:
+        params['tsquery'] = ' & '.join(terms)
+    if categories:
+        params['cats'] = list(categories)
+    for name, value in (
+        ('min_calories', min_calories), ('max_calories', max_calories),
+        ('min_protein', min_protein), ('max_protein', max_protein),
+        ('min_fat', min_fat), ('max_fat', max_fat),
+    ):
+        if value is not None:
+            params[name] = value
+
+    with _session() as session:
+        rows = session.execute(_get_search_stmt(shape), params).scalars().all()
+        return [r.to_slim_dict() for r in rows]
+
+
+# Compiled search statements keyed by which filters are active, so a
+# given filter shape pays statement construction only once per process
+_search_stmt_cache = {}
+
+
+def _get_search_stmt(shape):
+    """Build (once per shape) the bound-parameter SELECT for a search."""
+    stmt = _search_stmt_cache.get(shape)
+    if stmt is None:
+        from sqlalchemy import select, bindparam, func
+        from core.models import Recipe
+
+        (has_terms, has_categories,
+         has_min_cal, has_max_cal,
+         has_min_pro, has_max_pro,
+         has_min_fat, has_max_fat) = shape
+
+        stmt = select(Recipe)
+        if has_terms:
+            # Stored, GIN-indexed tsvector column: no per-row to_tsvector
+            stmt = stmt.where(
+                Recipe.search_tsv.op('@@')(
+                    func.to_tsquery('english', bindparam('tsquery'))
                 )
-        
-        # Category filter
-        if categories:
-            cat_filters = []
-            for cat in categories:
-                cat_filters.append(Recipe.categories.any(cat))
-            query = query.filter(or_(*cat_filters))
-        
-        # Nutrition filters
-        if min_calories is not None:
-            query = query.filter(Recipe.calories >= min_calories)
-        if max_calories is not None:
-            query = query.filter(Recipe.calories <= max_calories)
-        if min_protein is not None:
-            query = query.filter(Recipe.protein >= min_protein)
-        if max_protein is not None:
-            query = query.filter(Recipe.protein <= max_protein)
-        if min_fat is not None:
-            query = query.filter(Recipe.fat >= min_fat)
-        if max_fat is not None:
-            query = query.filter(Recipe.fat <= max_fat)
-        
-        # Execute and convert
-        results = query.limit(limit).all()
-        
-        return [r.to_slim_dict() for r in results]
-        
-    finally:
-        session.close()
+            )
+        if has_categories:
+            # && overlap: true when the row shares any requested category
+            stmt = stmt.where(Recipe.categories.overlap(bindparam('cats')))
+        if has_min_cal:
+            stmt = stmt.where(Recipe.calories >= bindparam('min_calories'))
+        if has_max_cal:
+            stmt = stmt.where(Recipe.calories <= bindparam('max_calories'))
+        if has_min_pro:
+            stmt = stmt.where(Recipe.protein >= bindparam('min_protein'))
+        if has_max_pro:
+            stmt = stmt.where(Recipe.protein <= bindparam('max_protein'))
+        if has_min_fat:
+            stmt = stmt.where(Recipe.fat >= bindparam('min_fat'))
+        if has_max_fat:
+            stmt = stmt.where(Recipe.fat <= bindparam('max_fat'))
+
+        stmt = stmt.limit(bindparam('lim'))
+        _search_stmt_cache[shape] = stmt
+
+    return stmt
 
 
 def get_recipe_count() -> int:
-    """Get total recipe count from database."""
+    """Get total recipe count from database (cached planner estimate)."""
     if USE_DATABASE:
-        from core.models import get_session, Recipe
-        
-        session = get_session()
-        try:
-            return session.query(Recipe).count()
-        finally:
-            session.close()
+        from core.cache import get_cache_manager
+        from core.models import Recipe
+        from sqlalchemy import text
+
+        cache = get_cache_manager()
+        count = cache.get('recipe_count')
+        if count is not None:
+            return count
+
+        with _session() as session:
+            # Planner estimate instead of a full-table COUNT(*) scan;
+            # fall back to the exact count when stats are missing
+            estimate = session.execute(text(
+                "SELECT reltuples::bigint FROM pg_class WHERE relname = 'recipes'"
+            )).scalar()
+            if estimate is None or estimate < 0:
+                estimate = session.query(Recipe).count()
+            count = int(estimate)
+
+        cache.set('recipe_count', count, ttl=300)
+        return count
     
     return 0
 
 
-def _slim_recipe(recipe: Dict[str, Any]) -> Dict[str, Any]:
-    """Keep only essential fields for search."""
-    return {
-        'id': recipe.get('id', 0),
-        'title': recipe.get('title', '')[:100],
-        'desc': (recipe.get('desc', '') or '')[:150],
-        'ingredients': (recipe.get('ingredients', []) or [])[:15],
-        'directions': (recipe.get('directions', []) or [])[:5],
-        'categories': (recipe.get('categories', []) or [])[:5],
-        'calories': recipe.get('calories', 0),
-        'protein': recipe.get('protein', 0),
-        'fat': recipe.get('fat', 0),
-        'sodium': recipe.get('sodium', 0),
-        'sugar': recipe.get('sugar', 0),
-        'saturates': recipe.get('saturates', 0),
-    }
+# Column order of the nutrient SoA (matches the slim recipe fields)
+NUTRIENT_KEYS = ('calories', 'protein', 'fat', 'sodium', 'sugar', 'saturates')
+
+
+def get_nutrient_columns(recipes: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Build a columnar (structure-of-arrays) view of recipe nutrients.
+
+    Returns one preallocated float32 array per nutrient, aligned with the
+    recipes list. Range filters over these columns run as vectorized
+    NumPy comparisons instead of per-row dict lookups, and float32 holds
+    the one-decimal nutrient values exactly at a quarter of the object
+    overhead.
+    """
+    n = len(recipes)
+    columns = {key: np.zeros(n, dtype=np.float32) for key in NUTRIENT_KEYS}
+
+    for i, recipe in enumerate(recipes):
+        for key in NUTRIENT_KEYS:
+            columns[key][i] = recipe.get(key) or 0
+
+    return columns
+
+
+@dataclass(slots=True)
+class SlimRecipe:
+    """
+    Compact in-memory recipe row.
+
+    Slots hold the twelve slim fields in fixed offsets (~5x less memory
+    than an equivalent dict and faster attribute access). The dict-style
+    accessors below keep the matcher/planner/route code, which reads rows
+    with .get() and [], working unchanged.
+    """
+    id: int = 0
+    title: str = ''
+    desc: str = ''
+    ingredients: List[str] = field(default_factory=list)
+    directions: List[str] = field(default_factory=list)
+    categories: List[str] = field(default_factory=list)
+    calories: float = 0
+    protein: float = 0
+    fat: float = 0
+    sodium: float = 0
+    sugar: float = 0
+    saturates: float = 0
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return hasattr(self, key)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain-dict view for mutation or JSON serialization."""
+        return {f.name: getattr(self, f.name) for f in fields(self)}
+
+    # get_recipe_by_id mutates and serializes its copy, so hand out a dict
+    copy = to_dict
+
+
+def _slim_recipe(recipe: Dict[str, Any]) -> SlimRecipe:
+    """
+    Keep only essential fields for search.
+
+    _preprocess_recipe guarantees every field is present and non-None, so
+    rows index directly and only slice when a field actually exceeds its
+    cap — short fields keep their existing objects instead of allocating
+    copies (~6 avoided allocations per recipe at load).
+    """
+    title = recipe['title']
+    desc = recipe['desc']
+    ingredients = recipe['ingredients']
+    directions = recipe['directions']
+    categories = recipe['categories']
+    return SlimRecipe(
+        id=recipe['id'],
+        title=title if len(title) <= 100 else title[:100],
+        desc=desc if len(desc) <= 150 else desc[:150],
+        ingredients=ingredients if len(ingredients) <= 15 else ingredients[:15],
+        directions=directions if len(directions) <= 5 else directions[:5],
+        categories=categories if len(categories) <= 5 else categories[:5],
+        calories=recipe['calories'],
+        protein=recipe['protein'],
+        fat=recipe['fat'],
+        sodium=recipe['sodium'],
+        sugar=recipe['sugar'],
+        saturates=recipe['saturates'],
+    )
 
 
 def _preprocess_recipe(recipe: Dict[str, Any]) -> Dict[str, Any]:
@@ -225,9 +411,9 @@ def _preprocess_recipe(recipe: Dict[str, Any]) -> Dict[str, Any]:
     processed = {}
     
     processed['id'] = recipe.get('id', 0)
-    processed['title'] = recipe.get('title', '')
-    processed['desc'] = recipe.get('desc', recipe.get('title', ''))
-    processed['categories'] = recipe.get('categories', [])
+    processed['title'] = recipe.get('title') or ''
+    processed['desc'] = recipe.get('desc') or processed['title']
+    processed['categories'] = recipe.get('categories') or []
     
     # Convert ingredients
     ingredients = recipe.get('ingredients', [])
@@ -261,11 +447,20 @@ def _preprocess_recipe(recipe: Dict[str, Any]) -> Dict[str, Any]:
     else:
         nutr_per_ing = recipe.get('nutr_per_ingredient', [])
         if nutr_per_ing:
-            processed['calories'] = round(sum(n.get('nrg', 0) for n in nutr_per_ing), 1)
-            processed['protein'] = round(sum(n.get('pro', 0) for n in nutr_per_ing), 1)
-            processed['fat'] = round(sum(n.get('fat', 0) for n in nutr_per_ing), 1)
-            processed['sodium'] = round(sum(n.get('sod', 0) for n in nutr_per_ing), 1)
-            processed['sugar'] = round(sum(n.get('sug', 0) for n in nutr_per_ing), 1)
+            # Accumulate all five totals in one pass over the list instead
+            # of five generator sweeps (this runs once per recipe at load)
+            calories = protein = fat = sodium = sugar = 0.0
+            for n in nutr_per_ing:
+                calories += n.get('nrg', 0)
+                protein += n.get('pro', 0)
+                fat += n.get('fat', 0)
+                sodium += n.get('sod', 0)
+                sugar += n.get('sug', 0)
+            processed['calories'] = round(calories, 1)
+            processed['protein'] = round(protein, 1)
+            processed['fat'] = round(fat, 1)
+            processed['sodium'] = round(sodium, 1)
+            processed['sugar'] = round(sugar, 1)
             processed['saturates'] = 0
         else:
             processed['calories'] = 0
@@ -292,9 +487,17 @@ def _preprocess_recipe(recipe: Dict[str, Any]) -> Dict[str, Any]:
     return processed
 
 
+# Memoized per dataset size: the corpus never changes within a process
+_stats_cache = {}
+
+
 def get_recipe_stats(recipes: List[Dict[str, Any]]) -> Dict[str, Any]:
-    """Calculate statistics about the recipe dataset."""
+    """Calculate statistics about the recipe dataset (memoized)."""
     total = len(recipes)
+
+    cached = _stats_cache.get(total)
+    if cached is not None:
+        return cached
     
     categories = set()
     for recipe in recipes:
@@ -304,7 +507,7 @@ def get_recipe_stats(recipes: List[Dict[str, Any]]) -> Dict[str, Any]:
     
     total_ingredients = sum(len(recipe.get('ingredients', [])) for recipe in recipes)
     
-    return {
+    stats = {
         'total_recipes': total,
         'unique_categories': len(categories),
         'total_ingredients': total_ingredients,
@@ -312,3 +515,5 @@ def get_recipe_stats(recipes: List[Dict[str, Any]]) -> Dict[str, Any]:
         'halal_compliant': True,
         'database_mode': USE_DATABASE
     }
+    _stats_cache[total] = stats
+    return stats
@@ -3,15 +3,68 @@ Meal Plan Assistant
 Generates balanced meal plans based on user preferences and nutrition goals
 """
 
-import random
+import functools
+import os
 from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
-from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
-from core.models import get_session, Recipe
+import numpy as np
+
+from core.models import get_session, remove_session, Recipe, main_ingredient_hashes
 from core.recipe_matcher import RecipeMatcher
 from core.query_parser import QueryParser
 
+# Shared executor for candidate prefetching. The candidate queries are
+# DB I/O (GIL released), and a plan has at most 4 distinct meal types.
+_EXECUTOR = ThreadPoolExecutor(max_workers=min(4, 2 * (os.cpu_count() or 1)))
+
+# Rows fetched per meal-type pool. One pool serves every slot of that meal
+# type in the plan (up to 7 days), so it needs enough headroom for the
+# per-meal calorie window and used-recipe exclusion applied in Python.
+POOL_SIZE = 500
+
+
+@functools.lru_cache(maxsize=128)
+def _static_constraints(meal_type: str, prefs_key: tuple,
+                        high_protein_goal: bool) -> Dict[str, Any]:
+    """Preference-dependent constraints, memoized on canonical inputs.
+
+    Pure in its arguments, so repeated (meal type, preferences) pairs
+    reuse one dict — callers copy it before adding per-meal calorie
+    windows and must not mutate the excluded list.
+    """
+    preferences = dict(prefs_key)
+    constraints = {'meal_type': meal_type}
+
+    # Protein goals (if high protein diet)
+    if high_protein_goal and meal_type in ('breakfast', 'lunch', 'dinner'):
+        constraints['protein_min'] = 15  # At least 15g per main meal
+
+    # User preferences
+    if preferences.get('vegetarian'):
+        constraints['vegetarian'] = True
+
+    if preferences.get('low_carb'):
+        constraints['carb_max'] = 30  # Low carb meals
+
+    if preferences.get('high_protein'):
+        constraints['protein_min'] = 20
+
+    # Excluded ingredients
+    excluded = []
+    if preferences.get('no_dairy'):
+        excluded.extend(['milk', 'cheese', 'butter', 'cream', 'yogurt'])
+    if preferences.get('no_gluten'):
+        excluded.extend(['flour', 'wheat', 'bread', 'pasta'])
+    if preferences.get('no_nuts'):
+        excluded.extend(['peanut', 'almond', 'walnut', 'cashew'])
+
+    if excluded:
+        constraints['excluded_ingredients'] = excluded
+
+    return constraints
+
 
 class MealPlanAssistant:
     """
@@ -26,9 +79,31 @@ class MealPlanAssistant:
     
     def __init__(self):
         """Initialize meal plan assistant."""
-        self.session = None
         self.query_parser = QueryParser()
-        
+        # One Generator per assistant: no Mersenne Twister lock per draw,
+        # and plans are reproducible if a seeded generator is swapped in
+        self.rng = np.random.default_rng()
+        # recipe id -> int32 array of main-ingredient hashes, so variety
+        # scoring never re-splits ingredient strings per candidate (each
+        # candidate is scored up to meals*days times)
+        self._hashes_cache = {}
+
+    def _recipe_hashes(self, recipe: Recipe) -> np.ndarray:
+        """Main-ingredient hashes for a recipe, as a cached int32 array.
+
+        Prefers the precomputed ingredient_hashes column; recipes migrated
+        before the column existed fall back to hashing in Python.
+        """
+        cached = self._hashes_cache.get(recipe.id)
+        if cached is not None:
+            return cached
+
+        hashes = recipe.ingredient_hashes or main_ingredient_hashes(recipe.ingredients)
+        arr = np.asarray(hashes, dtype=np.int32)
+
+        self._hashes_cache[recipe.id] = arr
+        return arr
+
     def generate_meal_plan(self, 
                           days: int = 7,
                           preferences: Optional[Dict[str, Any]] = None,
@@ -53,30 +128,27 @@ class MealPlanAssistant:
         
         preferences = preferences or {}
         nutrition_goals = nutrition_goals or self._default_nutrition_goals()
-        
-        self.session = get_session()
-        
-        try:
-            # Generate meal plan
-            meal_plan = self._generate_plan(
-                days, preferences, nutrition_goals, 
-                meals_per_day, variety_weight
-            )
-            
-            # Calculate nutrition summary
-            summary = self._calculate_nutrition_summary(meal_plan, nutrition_goals)
-            
-            return {
-                'meal_plan': meal_plan,
-                'summary': summary,
-                'preferences': preferences,
-                'nutrition_goals': nutrition_goals,
-                'generated_at': datetime.now().isoformat()
-            }
-            
-        finally:
-            if self.session:
-                self.session.close()
+
+        # Sessions are thread-scoped: the request thread's is released at
+        # the request boundary (models.remove_session) and reuses one
+        # identity map across the plan's queries; the prefetch executor
+        # threads release theirs in _prefetch_pool, since Flask's
+        # teardown never runs there
+        meal_plan = self._generate_plan(
+            days, preferences, nutrition_goals,
+            meals_per_day, variety_weight
+        )
+
+        # Calculate nutrition summary
+        summary = self._calculate_nutrition_summary(meal_plan, nutrition_goals)
+
+        return {
+            'meal_plan': meal_plan,
+            'summary': summary,
+            'preferences': preferences,
+            'nutrition_goals': nutrition_goals,
+            'generated_at': datetime.now().isoformat()
+        }
     
     def _generate_plan(self, days: int, preferences: Dict[str, Any],
                       nutrition_goals: Dict[str, Any], meals_per_day: int,
@@ -86,7 +158,9 @@ class MealPlanAssistant:
         
         meal_plan = []
         used_recipe_ids = set()
-        used_ingredients = defaultdict(int)  # Track ingredient usage
+        # Hashes of main ingredients already in the plan, kept sorted so
+        # variety scoring can binary-search them
+        used_hashes = np.empty(0, dtype=np.int32)
         
         # Meal type distribution
         meal_types = self._get_meal_type_distribution(meals_per_day)
@@ -94,64 +168,86 @@ class MealPlanAssistant:
         # Calculate target calories per meal
         daily_calories = nutrition_goals.get('calories', 2000)
         calories_per_meal = daily_calories / meals_per_day
-        
+        min_cal = max(50, calories_per_meal * 0.7)
+
+        # One shuffled candidate pool per distinct meal type for the whole
+        # plan: the random-order candidate queries dominate plan latency,
+        # and the dynamic per-meal filters (calorie window, used recipes)
+        # are cheap to apply in Python against a pool.
+        pools = self._prefetch_candidate_pools(
+            meal_types, preferences, nutrition_goals
+        )
+
         for day_num in range(1, days + 1):
             day_meals = []
             day_calories = 0
             day_protein = 0
-            
+
             for meal_idx, meal_type in enumerate(meal_types):
-                # Build query constraints for this meal
-                constraints = self._build_meal_constraints(
-                    meal_type, preferences, nutrition_goals,
-                    calories_per_meal, day_calories, daily_calories
-                )
-                
-                # Get candidate recipes
-                candidates = self._get_meal_candidates(
-                    constraints, used_recipe_ids, limit=50
-                )
-                
+                # Filter the pool against recipes picked earlier in the plan
+                # and the per-meal calorie window from the remaining budget
+                remaining_calories = daily_calories - day_calories
+                max_cal = calories_per_meal * 1.3
+                if remaining_calories > 0:
+                    max_cal = min(remaining_calories, max_cal)
+
+                candidates = [
+                    r for r in pools.get(meal_type, ())
+                    if r.id not in used_recipe_ids
+                    and min_cal <= r.calories <= max_cal
+                ]
+
                 if not candidates:
-                    # Fallback: relax constraints
+                    # Relax the calorie window before going back to the DB
+                    candidates = [
+                        r for r in pools.get(meal_type, ())
+                        if r.id not in used_recipe_ids
+                    ]
+
+                if not candidates:
+                    # Fallback: pool exhausted, relax constraints entirely
                     candidates = self._get_meal_candidates(
                         {'meal_type': meal_type}, used_recipe_ids, limit=20
                     )
-                
+
+                # The pool is already randomly ordered; cap what the variety
+                # scorer sees to keep selection cost as before
+                candidates = candidates[:50]
+
                 if candidates:
                     # Select recipe based on variety
                     selected = self._select_recipe_with_variety(
-                        candidates, used_ingredients, variety_weight
+                        candidates, used_hashes, variety_weight
                     )
                     
-                    # Add to plan
-                    meal_dict = selected.to_slim_dict()
-                    meal_dict['meal_type'] = meal_type
-                    meal_dict['meal_number'] = meal_idx + 1
-                    meal_dict['nutrition'] = {
-                        'calories': selected.calories or 0,
-                        'protein': selected.protein or 0,
-                        'fat': selected.fat or 0,
-                        'sodium': selected.sodium or 0,
-                        'sugar': selected.sugar or 0,
-                        'saturates': selected.saturates or 0
+                    # Add to plan. Only scheduling metadata here — the
+                    # slim payload columns aren't loaded on candidates and
+                    # are merged in one batched query after the loop
+                    meal_dict = {
+                        'id': selected.id,
+                        'meal_type': meal_type,
+                        'meal_number': meal_idx + 1,
+                        'nutrition': {
+                            'calories': selected.calories,
+                            'protein': selected.protein,
+                            'fat': selected.fat,
+                            'sodium': selected.sodium,
+                            'sugar': selected.sugar,
+                            'saturates': selected.saturates
+                        }
                     }
                     
                     day_meals.append(meal_dict)
                     
                     # Update tracking
                     used_recipe_ids.add(selected.id)
-                    day_calories += (selected.calories or 0)
-                    day_protein += (selected.protein or 0)
+                    day_calories += selected.calories
+                    day_protein += selected.protein
                     
-                    # Track ingredients
-                    if selected.ingredients:
-                        for ing in selected.ingredients[:5]:  # Track top ingredients
-                            # Extract main ingredient word
-                            words = ing.lower().split()
-                            main_word = next((w for w in words if len(w) > 4), words[0] if words else '')
-                            if main_word:
-                                used_ingredients[main_word] += 1
+                    # Track ingredients (union keeps the array sorted)
+                    used_hashes = np.union1d(
+                        used_hashes, self._recipe_hashes(selected)
+                    )
             
             # Add day to plan
             meal_plan.append({
@@ -163,9 +259,28 @@ class MealPlanAssistant:
                     'protein': round(day_protein, 1)
                 }
             })
-        
+
+        self._attach_recipe_details(meal_plan)
+
         return meal_plan
-    
+
+    def _attach_recipe_details(self, meal_plan: List[Dict[str, Any]]) -> None:
+        """Merge the full slim payloads into the plan, one IN query total."""
+        recipe_ids = [meal['id'] for day in meal_plan for meal in day['meals']]
+        if not recipe_ids:
+            return
+
+        rows = get_session().query(Recipe).filter(
+            Recipe.id.in_(recipe_ids)
+        ).all()
+        slim_by_id = {recipe.id: recipe.to_slim_dict() for recipe in rows}
+
+        for day in meal_plan:
+            day['meals'] = [
+                {**slim_by_id.get(meal['id'], {}), **meal}
+                for meal in day['meals']
+            ]
+
     def _get_meal_type_distribution(self, meals_per_day: int) -> List[str]:
         """Get meal type distribution based on meals per day."""
         if meals_per_day == 2:
@@ -181,61 +296,88 @@ class MealPlanAssistant:
                                 nutrition_goals: Dict[str, Any], calories_per_meal: float,
                                 day_calories: float, daily_calories: float) -> Dict[str, Any]:
         """Build SQL constraints for meal selection."""
-        constraints = {'meal_type': meal_type}
-        
+        constraints = dict(_static_constraints(
+            meal_type,
+            tuple(sorted(preferences.items())),
+            nutrition_goals.get('protein', 0) >= 100
+        ))
+
         # Calorie constraints (±30% of target per meal)
         remaining_calories = daily_calories - day_calories
         if remaining_calories > 0:
             min_cal = max(50, calories_per_meal * 0.7)
             max_cal = min(remaining_calories, calories_per_meal * 1.3)
             constraints['calories'] = {'min': min_cal, 'max': max_cal}
-        
-        # Protein goals (if high protein diet)
-        if nutrition_goals.get('protein', 0) >= 100:  # High protein
-            if meal_type in ['breakfast', 'lunch', 'dinner']:
-                constraints['protein_min'] = 15  # At least 15g per main meal
-        
-        # User preferences
-        if preferences.get('vegetarian'):
-            constraints['vegetarian'] = True
-        
-        if preferences.get('low_carb'):
-            constraints['carb_max'] = 30  # Low carb meals
-        
-        if preferences.get('high_protein'):
-            constraints['protein_min'] = 20
-        
-        # Excluded ingredients
-        excluded = []
-        if preferences.get('no_dairy'):
-            excluded.extend(['milk', 'cheese', 'butter', 'cream', 'yogurt'])
-        if preferences.get('no_gluten'):
-            excluded.extend(['flour', 'wheat', 'bread', 'pasta'])
-        if preferences.get('no_nuts'):
-            excluded.extend(['peanut', 'almond', 'walnut', 'cashew'])
-        
-        if excluded:
-            constraints['excluded_ingredients'] = excluded
-        
+
         return constraints
     
-    def _get_meal_candidates(self, constraints: Dict[str, Any], 
+    def _prefetch_candidate_pools(self, meal_types: List[str],
+                                  preferences: Dict[str, Any],
+                                  nutrition_goals: Dict[str, Any]) -> Dict[str, List[Recipe]]:
+        """Fetch one candidate pool per distinct meal type, concurrently.
+
+        Each pool query applies only the filters shared by every slot of
+        that meal type (preferences, protein goals, excluded ingredients);
+        per-meal state is filtered in Python. This turns up to meals*days
+        random-order queries per plan into 2-4.
+        """
+        futures = {
+            # A zero calorie budget skips the per-meal calorie window in
+            # _build_meal_constraints; the shared filters still apply.
+            meal_type: _EXECUTOR.submit(
+                self._prefetch_pool,
+                self._build_meal_constraints(
+                    meal_type, preferences, nutrition_goals, 0, 0, 0
+                )
+            )
+            for meal_type in dict.fromkeys(meal_types)
+        }
+        return {meal_type: future.result() for meal_type, future in futures.items()}
+
+    def _prefetch_pool(self, constraints: Dict[str, Any]) -> List[Recipe]:
+        """Run one candidate query on the executor and release its session.
+
+        Flask's teardown_appcontext never runs on executor threads, so
+        the thread-local scoped session must be removed here — otherwise
+        each pool thread keeps an open transaction and pins a pooled
+        connection for the worker's lifetime.
+        """
+        try:
+            return self._get_meal_candidates(constraints, set(), POOL_SIZE)
+        finally:
+            remove_session()
+
+    def _get_meal_candidates(self, constraints: Dict[str, Any],
                             used_recipe_ids: set, limit: int = 50) -> List[Recipe]:
-        """Get candidate recipes matching constraints."""
+        """Get candidate recipes matching constraints.
+
+        Uses the thread-local session. On the request thread that session
+        is released by Flask's teardown; executor callers must go through
+        _prefetch_pool, which removes the session when the query is done.
+        """
         from sqlalchemy import or_, and_, func
-        
-        query = self.session.query(Recipe)
+        from sqlalchemy.orm import load_only
+
+        # Candidates are only scored and filtered, so fetch the scoring
+        # columns and skip the wide ones (ingredients, directions,
+        # search_text, ...); variety scoring reads the precomputed
+        # ingredient_hashes, and the full payload is batch-fetched once
+        # recipes are selected. Rows migrated before the hashes column
+        # existed lazy-load ingredients in the Python fallback.
+        query = get_session().query(Recipe).options(load_only(
+            Recipe.id, Recipe.title, Recipe.ingredient_hashes,
+            Recipe.calories, Recipe.protein, Recipe.fat,
+            Recipe.sodium, Recipe.sugar, Recipe.saturates
+        ))
         
         # Filter out already used recipes
         if used_recipe_ids:
             query = query.filter(~Recipe.id.in_(used_recipe_ids))
         
-        # Meal type filter
+        # Meal type filter (denormalized column, B-tree indexed)
         meal_type = constraints.get('meal_type')
         if meal_type:
-            query = query.filter(
-                func.lower(Recipe.search_text).like(f'%{meal_type}%')
-            )
+            query = query.filter(Recipe.meal_type == meal_type)
         
         # Calorie constraints
         if 'calories' in constraints:
@@ -249,23 +391,21 @@ class MealPlanAssistant:
         if 'protein_min' in constraints:
             query = query.filter(Recipe.protein >= constraints['protein_min'])
         
-        # Vegetarian filter
+        # Vegetarian filter (denormalized flag, B-tree indexed)
         if constraints.get('vegetarian'):
+            query = query.filter(Recipe.is_vegetarian.is_(True))
+
+        # Excluded ingredients: one GIN-indexed array-overlap test instead
+        # of one sequential-scan LIKE per excluded ingredient
+        excluded = constraints.get('excluded_ingredients', [])
+        if excluded:
             query = query.filter(
-                func.lower(Recipe.search_text).like('%vegetarian%')
+                ~Recipe.ingredient_tags.overlap([exc.lower() for exc in excluded])
             )
         
-        # Excluded ingredients
-        excluded = constraints.get('excluded_ingredients', [])
-        for exc in excluded:
-            pattern = f'%{exc.lower()}%'
-            query = query.filter(~func.lower(Recipe.search_text).like(pattern))
-        
-        # Ensure nutrition data exists
-        query = query.filter(
-            Recipe.calories.isnot(None),
-            Recipe.calories > 0
-        )
+        # Ensure nutrition data exists (calories is NOT NULL, so a
+        # positive check is sufficient)
+        query = query.filter(Recipe.calories > 0)
         
         # Get random candidates for variety
         candidates = query.order_by(func.random()).limit(limit).all()
@@ -273,85 +413,74 @@ class MealPlanAssistant:
         return candidates
     
     def _select_recipe_with_variety(self, candidates: List[Recipe],
-                                   used_ingredients: Dict[str, int],
+                                   used_hashes: np.ndarray,
                                    variety_weight: float) -> Recipe:
         """
         Select recipe that maximizes variety.
-        
+
         Variety score based on:
         - How many new ingredients it introduces
         - How few repeated ingredients it has
+
+        Scoring runs vectorized over a padded [N, 5] matrix of main-
+        ingredient hashes; used_hashes is a sorted array so membership
+        is a binary search, not a per-candidate Python loop.
         """
         if not candidates:
             return None
-        
+
         if variety_weight < 0.1:
             # Low variety weight: just pick random
-            return random.choice(candidates)
-        
-        best_recipe = None
-        best_score = -1
-        
-        for recipe in candidates:
-            variety_score = 0
-            
-            if recipe.ingredients:
-                # Count new vs repeated ingredients
-                new_ingredients = 0
-                repeated_ingredients = 0
-                
-                for ing in recipe.ingredients[:5]:
-                    words = ing.lower().split()
-                    main_word = next((w for w in words if len(w) > 4), words[0] if words else '')
-                    
-                    if main_word:
-                        if used_ingredients.get(main_word, 0) == 0:
-                            new_ingredients += 1
-                        else:
-                            repeated_ingredients += 1
-                
-                # Variety score: favor new ingredients
-                variety_score = new_ingredients - (repeated_ingredients * 0.5)
-            
-            # Combine with random factor (to avoid being too deterministic)
-            random_factor = random.random() * (1 - variety_weight)
-            total_score = variety_score * variety_weight + random_factor
-            
-            if total_score > best_score:
-                best_score = total_score
-                best_recipe = recipe
-        
-        return best_recipe or candidates[0]
+            return candidates[int(self.rng.integers(len(candidates)))]
+
+        # Pad to 5 hashes per row; 0 marks an empty slot (FNV-1a never
+        # hashes a word to 0)
+        hashes = np.zeros((len(candidates), 5), dtype=np.int32)
+        for i, recipe in enumerate(candidates):
+            row = self._recipe_hashes(recipe)[:5]
+            hashes[i, :len(row)] = row
+
+        valid = hashes != 0
+        if used_hashes.size:
+            # Binary-search membership against the sorted used array.
+            # searchsorted returns len(used) for values above the max,
+            # which the clip maps to a slot that can't compare equal.
+            idx = np.searchsorted(used_hashes, hashes)
+            found = used_hashes[np.clip(idx, 0, used_hashes.size - 1)] == hashes
+            repeated = (found & valid).sum(axis=1)
+        else:
+            repeated = np.zeros(len(candidates), dtype=np.int32)
+        new = valid.sum(axis=1) - repeated
+
+        # Variety score favors new ingredients. A single softmax-weighted
+        # draw keeps the choice non-deterministic (higher variety_weight
+        # concentrates the distribution on the best-scoring candidates)
+        # without generating a noise value per candidate.
+        scores = (new - 0.5 * repeated).astype(np.float64)
+        weights = np.exp((scores - scores.max()) * variety_weight)
+        selected_idx = self.rng.choice(len(candidates), p=weights / weights.sum())
+
+        return candidates[int(selected_idx)]
     
     def _calculate_nutrition_summary(self, meal_plan: List[Dict[str, Any]],
                                     nutrition_goals: Dict[str, Any]) -> Dict[str, Any]:
         """Calculate nutrition summary for the meal plan."""
-        total_nutrition = {
-            'calories': 0,
-            'protein': 0,
-            'fat': 0,
-            'sodium': 0,
-            'sugar': 0
-        }
-        
-        for day in meal_plan:
-            for meal in day['meals']:
-                nutrition = meal.get('nutrition', {})
-                total_nutrition['calories'] += nutrition.get('calories', 0)
-                total_nutrition['protein'] += nutrition.get('protein', 0)
-                total_nutrition['fat'] += nutrition.get('fat', 0)
-                total_nutrition['sodium'] += nutrition.get('sodium', 0)
-                total_nutrition['sugar'] += nutrition.get('sugar', 0)
-        
+        nutrients = ('calories', 'protein', 'fat', 'sodium', 'sugar')
+
+        # Stack per-meal nutrition into an (M, 5) matrix and reduce once
+        # instead of accumulating five dict keys per meal in Python
+        rows = [
+            [meal.get('nutrition', {}).get(key, 0) for key in nutrients]
+            for day in meal_plan for meal in day['meals']
+        ]
+        matrix = np.asarray(rows, dtype=np.float64).reshape(len(rows), 5)
+
+        totals = matrix.sum(axis=0)
+        total_nutrition = dict(zip(nutrients, totals.tolist()))
+
         # Calculate averages
         num_days = len(meal_plan)
-        avg_nutrition = {
-            'calories': round(total_nutrition['calories'] / num_days, 1),
-            'protein': round(total_nutrition['protein'] / num_days, 1),
-            'fat': round(total_nutrition['fat'] / num_days, 1),
-            'sodium': round(total_nutrition['sodium'] / num_days, 1),
-            'sugar': round(total_nutrition['sugar'] / num_days, 1)
-        }
+        avg_nutrition = dict(zip(nutrients, (totals / num_days).round(1).tolist()))
         
         # Calculate goal achievement
         goal_achievement = {}
@@ -3,10 +3,10 @@ Database Models for Recipe Buddy
 SQLAlchemy models for PostgreSQL (Neon)
 """
 
-from sqlalchemy import create_engine, Column, Integer, String, Float, Text, ARRAY
+from sqlalchemy import create_engine, Column, Computed, Integer, String, Float, Text, Boolean, text
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import sessionmaker, scoped_session
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, TSVECTOR
 import os
 
 Base = declarative_base()
@@ -18,6 +18,9 @@ class Recipe(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(255), nullable=False, index=True)
+    # Lowercased at ingest so scoring predicates compare directly
+    # (pg_trgm-indexed) instead of wrapping every row in lower()
+    title_lower = Column(String(255))
     description = Column(Text)
     
     # Store as arrays for easy querying
@@ -25,16 +28,43 @@ class Recipe(Base):
     directions = Column(ARRAY(Text))
     categories = Column(ARRAY(String(100)))
     
-    # Nutrition info (per serving or per 100g)
-    calories = Column(Float, default=0, index=True)
-    protein = Column(Float, default=0, index=True)
-    fat = Column(Float, default=0, index=True)
-    sodium = Column(Float, default=0)
-    sugar = Column(Float, default=0)
-    saturates = Column(Float, default=0)
+    # Nutrition info (per serving or per 100g). NOT NULL with a server
+    # default so readers never branch on None and the planner skips
+    # NULL handling on these columns.
+    calories = Column(Float, nullable=False, server_default=text('0'), index=True)
+    protein = Column(Float, nullable=False, server_default=text('0'), index=True)
+    fat = Column(Float, nullable=False, server_default=text('0'), index=True)
+    sodium = Column(Float, nullable=False, server_default=text('0'))
+    sugar = Column(Float, nullable=False, server_default=text('0'))
+    saturates = Column(Float, nullable=False, server_default=text('0'))
     
-    # For full-text search (pre-computed searchable text)
-    search_text = Column(Text)
+    # For full-text search. Computed server-side (double-weighted title +
+    # ingredients + categories, mirroring the old Python construction) so
+    # bulk inserts don't ship this — by far the widest column — over the
+    # wire for every row.
+    search_text = Column(Text, Computed(
+        "lower(coalesce(title, '') || ' ' || coalesce(title, '') || ' ' || "
+        "array_to_string(coalesce(ingredients, '{}'), ' ') || ' ' || "
+        "array_to_string(coalesce(categories, '{}'), ' '))",
+        persisted=True
+    ))
+
+    # Stored tsvector over search_text, GIN-indexed at migration time.
+    # Recipes are read-only after migration, so a one-time UPDATE stands
+    # in for the usual trigger.
+    search_tsv = Column(TSVECTOR)
+
+    # Denormalized at ingest so the meal planner filters on indexed
+    # equality/array-overlap instead of leading-wildcard LIKEs over
+    # search_text (which force sequential scans)
+    meal_type = Column(String(20), index=True)
+    is_vegetarian = Column(Boolean, default=False, index=True)
+    ingredient_tags = Column(ARRAY(String(40)))
+
+    # Signed FNV-1a hashes of the top-5 main ingredient words, so the meal
+    # planner's variety scoring runs on fixed-size integer arrays instead
+    # of re-splitting ingredient strings per candidate
+    ingredient_hashes = Column(ARRAY(Integer))
     
     def to_dict(self):
         """Convert to dictionary for API response."""
@@ -54,14 +84,21 @@ class Recipe(Base):
         }
     
     def to_slim_dict(self):
-        """Convert to slim dictionary for search results."""
+        """Convert to slim dictionary for search results.
+
+        Lists are only sliced when over their cap, so most rows reuse the
+        loaded arrays instead of allocating three copies per result.
+        """
+        ingredients = self.ingredients or []
+        directions = self.directions or []
+        categories = self.categories or []
         return {
             'id': self.id,
             'title': self.title,
             'desc': (self.description or self.title)[:150],
-            'ingredients': (self.ingredients or [])[:10],
-            'directions': (self.directions or [])[:3],
-            'categories': (self.categories or [])[:5],
+            'ingredients': ingredients[:10] if len(ingredients) > 10 else ingredients,
+            'directions': directions[:3] if len(directions) > 3 else directions,
+            'categories': categories[:5] if len(categories) > 5 else categories,
             'calories': self.calories or 0,
             'protein': self.protein or 0,
             'fat': self.fat or 0,
@@ -71,6 +108,31 @@ class Recipe(Base):
         }
 
 
+def fnv1a32(word: str) -> int:
+    """FNV-1a 32-bit hash, folded to signed for ARRAY(Integer) storage."""
+    h = 0x811c9dc5
+    for byte in word.encode('utf-8'):
+        h = ((h ^ byte) * 0x01000193) & 0xffffffff
+    return h - 0x100000000 if h >= 0x80000000 else h
+
+
+def main_ingredient_hashes(ingredients) -> list:
+    """Hash the main word of each of the top-5 ingredient lines.
+
+    The main word is the first word longer than 4 characters (falling
+    back to the first word), matching the meal planner's variety logic.
+    Used to populate Recipe.ingredient_hashes at ingest and as a Python
+    fallback when the column is empty.
+    """
+    hashes = []
+    for ing in (ingredients or [])[:5]:
+        words = ing.lower().split()
+        main_word = next((w for w in words if len(w) > 4), words[0] if words else '')
+        if main_word:
+            hashes.append(fnv1a32(main_word))
+    return hashes
+
+
 # Database connection management
 _engine = None
 _SessionLocal = None
@@ -88,24 +150,45 @@ def get_engine():
         if 'sslmode' not in database_url:
             database_url += '?sslmode=require'
         
+        # Pool sized for gunicorn gthread workers (gunicorn.conf.py:
+        # threads = 8, env-tunable via GUNICORN_THREADS) plus up to 4
+        # meal-planner prefetch executor threads, which also hold
+        # sessions; each worker process gets its own engine, so the pool
+        # must cover one worker's threads, not the whole deployment.
         _engine = create_engine(
             database_url,
-            pool_size=5,
-            max_overflow=10,
+            pool_size=int(os.environ.get('DB_POOL_SIZE', 10)),
+            max_overflow=int(os.environ.get('DB_MAX_OVERFLOW', 10)),
             pool_pre_ping=True,
+            # Each combination of conditional filters compiles to its own
+            # statement; size the SQL compilation cache so all the shapes
+            # used by search and the meal planner stay resident
+            query_cache_size=1200,
             echo=False
         )
     return _engine
 
 
 def get_session():
-    """Get database session."""
+    """Get the thread-local database session (scoped per thread).
+
+    expire_on_commit=False keeps loaded Recipe rows usable after commits
+    instead of forcing a reload per attribute access.
+    """
     global _SessionLocal
     if _SessionLocal is None:
-        _SessionLocal = sessionmaker(bind=get_engine())
+        _SessionLocal = scoped_session(
+            sessionmaker(bind=get_engine(), expire_on_commit=False)
+        )
     return _SessionLocal()
 
 
+def remove_session():
+    """Release the thread-local session (call at request boundaries)."""
+    if _SessionLocal is not None:
+        _SessionLocal.remove()
+
+
 def init_db():
     """Initialize database tables."""
     engine = get_engine()
@@ -116,7 +199,9 @@ def init_db():
 def close_db():
     """Close database connections."""
     global _engine, _SessionLocal
+    if _SessionLocal:
+        _SessionLocal.remove()
+        _SessionLocal = None
     if _engine:
         _engine.dispose()
         _engine = None
-        _SessionLocal = None
@@ -3,44 +3,117 @@ NLP Query Parser Module
 Extracts structured requirements from natural language queries
 """
 
+import copy
+import functools
 import re
 import spacy
 from typing import Dict, List, Any, Tuple
 
 from config.vocabulary import (
-    NEGATION_WORDS, MEAL_TYPES, FOOD_CATEGORIES,
-    NUTRITION_KEYWORDS, COMMON_INGREDIENTS, DISH_NAMES
+    NEGATION_SINGLE, NEGATION_MULTI_RE, FOOD_CATEGORIES,
+    COMMON_INGREDIENTS, DISH_NAMES, DISH_SET, scan
 )
 from core.spell_corrector import SpellCorrector
 
+# Words that are never treated as ingredients, built once instead of a
+# fresh set (plus DISH_NAMES update) per parse
+_SKIP_WORDS = frozenset({
+    'meal', 'recipe', 'dish', 'food', 'calorie', 'calories', 'protein',
+    'quick', 'easy', 'healthy', 'high', 'low', 'breakfast', 'lunch',
+    'dinner', 'vegetarian', 'vegan', 'want', 'need', 'find', 'make'
+}) | DISH_SET
+
+# Negation patterns - order matters (more specific first). Compiled once
+# at import so each parse reuses the Pattern objects directly.
+_NEGATION_RX = tuple(re.compile(p, re.IGNORECASE) for p in (
+    # "doesn't have X", "doesn't include X", "doesn't contain X"
+    r"(?:doesn'?t|does\s*not|dont)\s+(?:have|include|contain|want|use|need)\s+(\w+(?:\s+\w+)?)",
+    # "don't want X", "don't add X"
+    r"(?:don'?t|do\s*not)\s+(?:want|use|add|include|need)\s+(\w+(?:\s+\w+)?)",
+    # "but no X", "and no X"
+    r"(?:but|and)\s+no\s+(\w+(?:\s+\w+)?)",
+    # Standard patterns
+    r'without\s+(\w+(?:\s+\w+)?)',
+    r'\bno\s+(\w+(?:\s+\w+)?)',
+    r'avoid(?:ing)?\s+(\w+(?:\s+\w+)?)',
+    r'exclud(?:e|ing)\s+(\w+(?:\s+\w+)?)',
+    r'(\w+)[\s-]free\b',
+    r'skip(?:ping)?\s+(\w+(?:\s+\w+)?)',
+    r'hold\s+(?:the\s+)?(\w+(?:\s+\w+)?)',
+    r'minus\s+(\w+(?:\s+\w+)?)',
+    r'leave\s+out\s+(\w+(?:\s+\w+)?)',
+    r'not?\s+(?:any|the)\s+(\w+(?:\s+\w+)?)',
+))
+
+# Numeric nutrition constraint patterns, as (compiled pattern, min/max)
+_NUTRITION_RX = tuple((re.compile(p), constraint_type) for p, constraint_type in (
+    (r'at least (\d+)\s*(?:grams?|g)?\s*(?:of\s+)?(protein|fat|sodium)', 'min'),
+    (r'at least (\d+)\s*(calories?|cal)', 'min'),
+    (r'(?:more than|over)\s*(\d+)\s*(?:grams?|g)?\s*(?:of\s+)?(protein|fat|sodium)', 'min'),
+    (r'(?:less than|under)\s*(\d+)\s*(?:grams?|g)?\s*(?:of\s+)?(protein|fat|sodium)', 'max'),
+    (r'(?:less than|under)\s*(\d+)\s*(calories?|cal)', 'max'),
+))
+
+# Singleton parser backing the module-level parse cache below. Every
+# QueryParser shares the same spaCy model, so results are identical
+# across instances and one cache can serve them all.
+_parser = None
+
+
+@functools.lru_cache(maxsize=2048)
+def _parse_cached(query: str, correct_spelling: bool) -> Dict[str, Any]:
+    """Run the full parse pipeline, memoized on (query, correct_spelling)."""
+    return _parser._parse(query, correct_spelling)
+
 
 class QueryParser:
     """Parse natural language queries to extract recipe requirements."""
-    
+
+    # Shared spaCy model: loading en_core_web_sm takes hundreds of ms, so
+    # repeated instantiations (routes, meal planner) reuse one pipeline.
+    # Nothing in the parse path runs it anymore (extraction is vocabulary
+    # scans plus regexes), so the load only needs to happen if a future
+    # feature actually consumes the pipeline.
+    _nlp = None
+
     def __init__(self):
         """Initialize spaCy model and spell corrector."""
-        # Load spaCy English model
-        try:
-            self.nlp = spacy.load("en_core_web_sm")
-        except OSError:
-            print("Downloading spaCy English model...")
-            import subprocess
-            subprocess.run(["python", "-m", "spacy", "download", "en_core_web_sm"])
-            self.nlp = spacy.load("en_core_web_sm")
-        
+        if QueryParser._nlp is None:
+            # Load spaCy English model
+            try:
+                QueryParser._nlp = spacy.load("en_core_web_sm")
+            except OSError:
+                print("Downloading spaCy English model...")
+                import subprocess
+                subprocess.run(["python", "-m", "spacy", "download", "en_core_web_sm"])
+                QueryParser._nlp = spacy.load("en_core_web_sm")
+        self.nlp = QueryParser._nlp
+
         self.spell_corrector = SpellCorrector()
-    
+
+        global _parser
+        if _parser is None:
+            _parser = self
+
     def parse(self, query: str, correct_spelling: bool = True) -> Dict[str, Any]:
         """
         Parse a natural language query and extract requirements.
-        
+
+        Repeated queries (default UI prompts, meal-plan regeneration) skip
+        the vocabulary and regex scans entirely via an LRU cache. The
+        cached result is deep-copied so callers can mutate their copy.
+
         Args:
             query: User's search query
             correct_spelling: Whether to apply spell correction
-            
+
         Returns:
             Parsed query with extracted components
         """
+        return copy.deepcopy(_parse_cached(query, correct_spelling))
+
+    def _parse(self, query: str, correct_spelling: bool) -> Dict[str, Any]:
+        """Uncached parse pipeline (see parse)."""
         original_query = query
         corrections = []
         
@@ -49,8 +122,7 @@ class QueryParser:
             query, corrections = self.spell_corrector.correct(query)
         
         query_lower = query.lower()
-        doc = self.nlp(query_lower)
-        
+
         result = {
             'original_query': original_query,
             'corrected_query': query if corrections else None,
@@ -63,120 +135,82 @@ class QueryParser:
             'dish_name': None
         }
         
+        # One vocabulary pass: every extractor below consumes the same
+        # hit list instead of scanning the query per keyword list
+        hits = list(scan(query_lower))
+
         # Extract components
-        result['dish_name'] = self._extract_dish_name(query_lower)
-        
-        included, excluded = self._extract_ingredients(query_lower, doc)
+        result['dish_name'] = self._extract_dish_name(hits)
+
+        included, excluded = self._extract_ingredients(query_lower, hits)
         result['ingredients'] = included
         result['excluded_ingredients'] = excluded
-        
-        result['meal_type'] = self._extract_meal_type(query_lower)
-        result['categories'] = self._extract_categories(query_lower)
+
+        result['meal_type'] = self._extract_meal_type(hits)
+        result['categories'] = self._extract_categories(hits)
         result['nutrition'] = self._extract_nutrition(query_lower)
-        
+
         return result
-    
-    def _extract_dish_name(self, query: str) -> str:
-        """Extract dish name from the query."""
-        for dish in DISH_NAMES:
-            if dish in query:
-                return dish
+
+    def _extract_dish_name(self, hits: List[Tuple[int, str, str]]) -> str:
+        """Extract the first dish name found in the query."""
+        for _end, bucket, canonical in hits:
+            if bucket == 'dish':
+                return canonical
         return None
-    
-    def _extract_meal_type(self, query: str) -> str:
-        """Extract meal type from the query."""
-        for meal_type, keywords in MEAL_TYPES.items():
-            for keyword in keywords:
-                if keyword in query:
-                    return meal_type
+
+    def _extract_meal_type(self, hits: List[Tuple[int, str, str]]) -> str:
+        """Extract the first meal type found in the query."""
+        for _end, bucket, canonical in hits:
+            if bucket == 'meal_type':
+                return canonical
         return None
-    
-    def _extract_categories(self, query: str) -> List[str]:
+
+    def _extract_categories(self, hits: List[Tuple[int, str, str]]) -> List[str]:
         """Extract food categories from the query."""
-        categories = []
-        for category, keywords in FOOD_CATEGORIES.items():
-            for keyword in keywords:
-                if keyword in query:
-                    categories.append(category)
-                    break
-        return categories
-    
-    def _extract_ingredients(self, query: str, doc) -> Tuple[List[str], List[str]]:
+        found = {canonical for _, bucket, canonical in hits if bucket == 'category'}
+        return [category for category in FOOD_CATEGORIES if category in found]
+
+    def _extract_ingredients(self, query: str,
+                             hits: List[Tuple[int, str, str]]) -> Tuple[List[str], List[str]]:
         """Extract included and excluded ingredients from the query."""
         included = []
         excluded = []
-        
-        # Words to skip
-        skip_words = {
-            'meal', 'recipe', 'dish', 'food', 'calorie', 'calories', 'protein',
-            'quick', 'easy', 'healthy', 'high', 'low', 'breakfast', 'lunch',
-            'dinner', 'vegetarian', 'vegan', 'want', 'need', 'find', 'make'
-        }
-        skip_words.update(DISH_NAMES)
-        
-        # Negation patterns - order matters (more specific first)
-        negation_patterns = [
-            # "doesn't have X", "doesn't include X", "doesn't contain X"
-            r"(?:doesn'?t|does\s*not|dont)\s+(?:have|include|contain|want|use|need)\s+(\w+(?:\s+\w+)?)",
-            # "don't want X", "don't add X"
-            r"(?:don'?t|do\s*not)\s+(?:want|use|add|include|need)\s+(\w+(?:\s+\w+)?)",
-            # "but no X", "and no X"
-            r"(?:but|and)\s+no\s+(\w+(?:\s+\w+)?)",
-            # Standard patterns
-            r'without\s+(\w+(?:\s+\w+)?)',
-            r'\bno\s+(\w+(?:\s+\w+)?)',
-            r'avoid(?:ing)?\s+(\w+(?:\s+\w+)?)',
-            r'exclud(?:e|ing)\s+(\w+(?:\s+\w+)?)',
-            r'(\w+)[\s-]free\b',
-            r'skip(?:ping)?\s+(\w+(?:\s+\w+)?)',
-            r'hold\s+(?:the\s+)?(\w+(?:\s+\w+)?)',
-            r'minus\s+(\w+(?:\s+\w+)?)',
-            r'leave\s+out\s+(\w+(?:\s+\w+)?)',
-            r'not?\s+(?:any|the)\s+(\w+(?:\s+\w+)?)',
-        ]
-        
+
         # Find excluded ingredients
-        for pattern in negation_patterns:
-            for match in re.finditer(pattern, query, re.IGNORECASE):
+        for rx in _NEGATION_RX:
+            for match in rx.finditer(query):
                 excluded_item = match.group(1).strip().lower()
                 for ing in COMMON_INGREDIENTS:
                     if excluded_item in ing or ing in excluded_item:
-                        if ing not in excluded and ing not in skip_words:
+                        if ing not in excluded and ing not in _SKIP_WORDS:
                             excluded.append(ing)
         
-        # Find included ingredients
-        for ingredient in COMMON_INGREDIENTS:
-            if ingredient in query and ingredient not in DISH_NAMES:
-                # Check if negated
-                is_negated = False
-                ing_pos = query.find(ingredient)
-                context = query[max(0, ing_pos-30):ing_pos].lower()
-                
-                if any(neg in context for neg in NEGATION_WORDS):
-                    is_negated = True
-                if ingredient in excluded:
-                    is_negated = True
-                
-                if not is_negated and ingredient not in included:
-                    included.append(ingredient)
-        
+        # Find included ingredients from the shared vocabulary pass
+        for end, bucket, ingredient in hits:
+            if bucket != 'ingredient' or ingredient in DISH_SET:
+                continue
+
+            # Check if negated: token lookup for single negation words,
+            # one regex pass for multi-word phrases
+            context = query[max(0, end - len(ingredient) - 30):end - len(ingredient)]
+            is_negated = (
+                any(token in NEGATION_SINGLE for token in context.split())
+                or NEGATION_MULTI_RE.search(context) is not None
+                or ingredient in excluded
+            )
+
+            if not is_negated and ingredient not in included:
+                included.append(ingredient)
+
         return (included[:10], excluded[:10])
     
     def _extract_nutrition(self, query: str) -> Dict[str, Any]:
         """Extract nutritional requirements from the query."""
         nutrition = {}
-        
-        # Numeric constraint patterns
-        patterns = [
-            (r'at least (\d+)\s*(?:grams?|g)?\s*(?:of\s+)?(protein|fat|sodium)', 'min'),
-            (r'at least (\d+)\s*(calories?|cal)', 'min'),
-            (r'(?:more than|over)\s*(\d+)\s*(?:grams?|g)?\s*(?:of\s+)?(protein|fat|sodium)', 'min'),
-            (r'(?:less than|under)\s*(\d+)\s*(?:grams?|g)?\s*(?:of\s+)?(protein|fat|sodium)', 'max'),
-            (r'(?:less than|under)\s*(\d+)\s*(calories?|cal)', 'max'),
-        ]
-        
-        for pattern, constraint_type in patterns:
-            for match in re.finditer(pattern, query):
+
+        for rx, constraint_type in _NUTRITION_RX:
+            for match in rx.finditer(query):
                 value = int(match.group(1))
                 nutrient = match.group(2).lower()
                 
@@ -4,15 +4,18 @@ Hybrid search using TF-IDF + rule-based scoring
 Supports both in-memory (JSON) and database (PostgreSQL) modes
 """
 
+import re
+
 import numpy as np
 from typing import Dict, List, Any, Optional
 
 from config.settings import (
     TFIDF_MAX_FEATURES, TFIDF_NGRAM_RANGE,
-    TFIDF_MIN_DF, TFIDF_MAX_DF,
+    BM25_K1, BM25_B,
     RULE_BASED_WEIGHT, TFIDF_WEIGHT,
     USE_DATABASE
 )
+from core import data_loader
 
 
 class RecipeMatcher:
@@ -21,7 +24,10 @@ class RecipeMatcher:
     
     V2.1: Supports PostgreSQL database mode for efficient querying.
     """
-    
+
+    # Column order of the nutrient matrix (SoA layout, shared with data_loader)
+    NUTRIENT_KEYS = data_loader.NUTRIENT_KEYS
+
     def __init__(self, recipes: List[Dict[str, Any]], metadata: Dict[str, Any] = None):
         """Initialize with recipe dataset."""
         self.recipes = recipes
@@ -29,36 +35,123 @@ class RecipeMatcher:
         self.use_database = USE_DATABASE
         self.tfidf_vectorizer = None
         self.recipe_vectors = None
-        
+        self._tfidf_scale = None
+        self._postings = None
+        self._categories_cache = None
+        self.nutrient_matrix = None
+        self._titles_lower = None
+        self._texts_lower = None
+
         # Only build TF-IDF if not using database
         if not self.use_database and recipes:
             self._build_tfidf_index()
+            self._build_nutrient_matrix()
         elif self.use_database:
             print("✅ Using PostgreSQL database mode (no TF-IDF needed)")
-    
+
+    def _build_nutrient_matrix(self):
+        """
+        Build a contiguous (N, 6) float16 matrix of per-recipe nutrients.
+
+        Columnar layout lets nutrition constraints run as one vectorized
+        comparison per bound instead of per-recipe dict lookups. Half
+        precision halves the bytes streamed per scan; a handful of
+        sodium outliers exceed fp16's max of 65504, so the matrix is
+        clipped to the representable range first — the cast would
+        otherwise turn them into +inf (and warn), making them fail any
+        max-sodium bound they actually satisfy.
+        """
+        columns = data_loader.get_nutrient_columns(self.recipes)
+        matrix = np.stack([columns[key] for key in self.NUTRIENT_KEYS], axis=1)
+        self.nutrient_matrix = matrix.clip(
+            0, np.finfo(np.float16).max
+        ).astype(np.float16)
+
     def _build_tfidf_index(self):
-        """Build TF-IDF index for semantic search (only for JSON mode)."""
-        from sklearn.feature_extraction.text import TfidfVectorizer
+        """Build the BM25 term-weight index for semantic search (JSON mode).
+
+        BM25 outperforms plain TF-IDF cosine on keyword-style retrieval,
+        and a query scores as a sum of precomputed per-(term, doc)
+        weights — one sparse column lookup per query term, no
+        per-document dense work.
+        """
+        from sklearn.feature_extraction.text import HashingVectorizer
+        from scipy.sparse import csr_matrix
         import gc
-        
-        print("Building TF-IDF index...")
-        
-        recipe_texts = [self._recipe_to_text(r) for r in self.recipes]
+
+        print("Building BM25 index...")
+
+        # The searchable texts double as the scoring corpus: rule scoring,
+        # constraint masks and match reasons all read these cached
+        # lowercase strings instead of rebuilding them per query
+        self._texts_lower = [self._recipe_to_text(r) for r in self.recipes]
+        self._titles_lower = [r.get('title', '').lower() for r in self.recipes]
         gc.collect()
-        
-        self.tfidf_vectorizer = TfidfVectorizer(
-            max_features=TFIDF_MAX_FEATURES,
+
+        # Stateless hashing: tokens map straight into a fixed column
+        # space, so the build is a single streaming pass with no
+        # vocabulary dict (and no transient full-vocabulary peak before
+        # max_features pruning). Hash collisions just merge rare terms;
+        # the BM25 idf below downweights whatever lands in busy buckets.
+        self.tfidf_vectorizer = HashingVectorizer(
+            n_features=TFIDF_MAX_FEATURES,
             ngram_range=TFIDF_NGRAM_RANGE,
             stop_words='english',
-            min_df=TFIDF_MIN_DF,
-            max_df=TFIDF_MAX_DF,
-            dtype='float32'
+            alternate_sign=False,
+            norm=None,
+            dtype=np.float32
         )
-        
-        self.recipe_vectors = self.tfidf_vectorizer.fit_transform(recipe_texts)
-        del recipe_texts
+
+        counts = self.tfidf_vectorizer.transform(self._texts_lower)
+
+        # BM25 weight per (term, doc):
+        #   idf(t) * tf*(k1+1) / (tf + k1*(1 - b + b*len/avg_len))
+        # CSR keeps one entry per (doc, term), so document frequency is a
+        # bincount over the column indices and the per-document length
+        # norm expands across entries via repeat.
+        num_docs, num_terms = counts.shape
+        doc_freq = np.bincount(counts.indices, minlength=num_terms)
+        idf = np.log(1.0 + (num_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+        doc_len = np.asarray(counts.sum(axis=1)).ravel()
+        length_norm = BM25_K1 * (1.0 - BM25_B + BM25_B * doc_len / doc_len.mean())
+        norm_per_entry = np.repeat(length_norm, np.diff(counts.indptr))
+
+        tf = counts.data
+        weights = (idf[counts.indices] * tf * (BM25_K1 + 1.0)
+                   / (tf + norm_per_entry)).astype(np.float32)
+        self.recipe_vectors = csr_matrix(
+            (weights, counts.indices, counts.indptr), shape=counts.shape
+        )
+
+        # Quantize the CSR values to int8 with a single matrix-wide scale.
+        # Ranking is preserved up to quantization noise, the scoring
+        # matmul streams a quarter of the bytes, and the float32 matrix
+        # can be dropped — which matters at 512MB.
+        self._tfidf_scale = 127.0 / float(self.recipe_vectors.data.max())
+        self.recipe_vectors.data = np.round(
+            self.recipe_vectors.data * self._tfidf_scale
+        ).astype(np.int8)
+        self._build_postings()
         gc.collect()
-        print(f"TF-IDF index built with {self.recipe_vectors.shape[1]} features")
+        print(f"BM25 index built with {num_terms} features")
+
+    def _build_postings(self):
+        """Build an inverted token -> recipe-index posting index.
+
+        Each distinct token of a recipe's searchable text contributes one
+        entry, so a query term's membership vector comes from a handful
+        of posting arrays instead of a substring pass over every cached
+        text (see _term_vector). Arrays are sorted int32, ready for
+        set operations.
+        """
+        postings = {}
+        for idx, text in enumerate(self._texts_lower):
+            for token in set(re.findall(r'[a-z]+', text)):
+                postings.setdefault(token, []).append(idx)
+        self._postings = {
+            token: np.asarray(indices, dtype=np.int32)
+            for token, indices in postings.items()
+        }
     
     def _recipe_to_text(self, recipe: Dict[str, Any]) -> str:
         """Convert recipe to searchable text (compact version)."""
@@ -106,10 +199,50 @@ class RecipeMatcher:
         # Use database search if available
         if self.use_database:
             return self._search_database(parsed_query, max_results, offset)
-        
+
         # Otherwise use in-memory search with TF-IDF
         return self._search_memory(parsed_query, max_results, use_tfidf, query)
-    
+
+    def search_batch(self, parsed_queries: List[Dict[str, Any]], max_results: int = 10,
+                     use_tfidf: bool = True) -> List[List[Dict[str, Any]]]:
+        """
+        Search several parsed queries in one call.
+
+        In-memory mode stacks the query TF-IDF vectors and scores the whole
+        batch against the recipe matrix with a single sparse matmul,
+        amortizing the BLAS call across queries. Database mode (and the
+        no-TF-IDF path) falls back to per-query search.
+        """
+        if not parsed_queries:
+            return []
+
+        if self.use_database or not (use_tfidf and self.tfidf_vectorizer):
+            return [
+                self.search(pq, max_results=max_results, use_tfidf=use_tfidf)
+                for pq in parsed_queries
+            ]
+
+        query_texts = [self._query_from_parsed(pq).lower() for pq in parsed_queries]
+        query_vectors = self.tfidf_vectorizer.transform(query_texts)
+        batch_scores = self._semantic_scores(query_vectors)
+
+        return [
+            self._search_memory(pq, max_results, use_tfidf, query_texts[i],
+                                semantic_scores=batch_scores[i])
+            for i, pq in enumerate(parsed_queries)
+        ]
+
+    def _query_from_parsed(self, parsed_query: Dict[str, Any]) -> str:
+        """Build a raw query string from a parsed query."""
+        query_parts = []
+        if parsed_query.get('dish_name'):
+            query_parts.append(parsed_query['dish_name'])
+        if parsed_query.get('ingredients'):
+            query_parts.extend(parsed_query['ingredients'])
+        if parsed_query.get('categories'):
+            query_parts.extend(parsed_query['categories'])
+        return ' '.join(query_parts) if query_parts else 'recipe'
+
     def _search_database(self, parsed_query: Dict[str, Any], max_results: int, offset: int = 0) -> List[Dict[str, Any]]:
         """
         Search using PostgreSQL database with v2_enhanced scoring logic.
@@ -121,117 +254,174 @@ class RecipeMatcher:
         4. Only then calculate scores for valid matches
         """
         from core.models import get_session, Recipe
-        from sqlalchemy import or_, and_, func, desc, literal
-        
+        from sqlalchemy import func, desc
+
+        # Thread-local scoped session; the app teardown releases it at the
+        # end of the request, so no per-call open/close (and no connection
+        # checkout per search)
         session = get_session()
-        try:
-            # Start building query - get more candidates for post-processing
-            query = session.query(Recipe)
-            
-            # Build search terms
-            search_terms = []
-            required_ingredients = parsed_query.get('ingredients', [])
-            dish_name = parsed_query.get('dish_name')
-            categories = parsed_query.get('categories', [])
-            
-            if dish_name:
-                search_terms.append(dish_name)
-            if required_ingredients:
-                search_terms.extend(required_ingredients)
-            if categories:
-                search_terms.extend(categories)
-            
-            # STEP 1: EXCLUDE RECIPES WITH EXCLUDED INGREDIENTS (instant reject)
-            excluded = parsed_query.get('excluded_ingredients', [])
-            for exc in excluded:
-                # Check for individual words (e.g., "oil" not just "olive oil")
-                exc_lower = exc.lower()
-                # Use word boundaries to match whole words
-                exc_pattern = f"%{exc_lower}%"
-                query = query.filter(
-                    ~and_(
-                        func.lower(Recipe.search_text).like(exc_pattern),
-                        or_(
-                            func.lower(Recipe.title).like(exc_pattern),
-                            func.lower(Recipe.search_text).like(exc_pattern)
-                        )
-                    )
-                )
-            
-            # STEP 2: APPLY NUTRITION FILTERS (instant reject if not met)
-            nutrition_req = parsed_query.get('nutrition', {})
-            for nutrient, constraints in nutrition_req.items():
-                column = getattr(Recipe, nutrient, None)
-                if column is not None:
-                    # Recipe must have nutrition data
-                    query = query.filter(column.isnot(None))
-                    
-                    if 'min' in constraints:
-                        query = query.filter(column >= constraints['min'])
-                    if 'max' in constraints:
-                        query = query.filter(column <= constraints['max'])
-            
-            # STEP 3: FILTER BY REQUIRED INGREDIENTS (must have ALL)
-            # Each required ingredient must appear in search_text or title
-            if required_ingredients:
-                for ingredient in required_ingredients:
-                    ing_pattern = f"%{ingredient.lower()}%"
-                    query = query.filter(
-                        or_(
-                            func.lower(Recipe.title).like(ing_pattern),
-                            func.lower(Recipe.search_text).like(ing_pattern)
-                        )
-                    )
-            
-            # STEP 4: FILTER BY DISH NAME (if specified)
-            if dish_name:
-                dish_pattern = f"%{dish_name.lower()}%"
-                query = query.filter(
-                    or_(
-                        func.lower(Recipe.title).like(dish_pattern),
-                        func.lower(Recipe.search_text).like(dish_pattern)
-                    )
+
+        # Start building query
+        query = session.query(Recipe)
+
+        # Build search terms
+        search_terms = []
+        required_ingredients = parsed_query.get('ingredients', [])
+        dish_name = parsed_query.get('dish_name')
+        categories = parsed_query.get('categories', [])
+        
+        if dish_name:
+            search_terms.append(dish_name)
+        if required_ingredients:
+            search_terms.extend(required_ingredients)
+        if categories:
+            search_terms.extend(categories)
+        
+        # STEP 1: EXCLUDE RECIPES WITH EXCLUDED INGREDIENTS (instant reject)
+        # Each term is a GIN-indexed tsvector probe instead of a
+        # leading-wildcard LIKE that forces a sequential scan;
+        # search_text covers the title, so one predicate suffices
+        excluded = parsed_query.get('excluded_ingredients', [])
+        for exc in excluded:
+            query = query.filter(
+                ~Recipe.search_tsv.op('@@')(
+                    func.plainto_tsquery('english', exc.lower())
                 )
-            
-            # Get more candidates than needed (for scoring)
-            candidates = query.limit(max_results * 10).all()
-            
-            # STEP 5: CALCULATE RULE-BASED SCORES (v2_enhanced style)
-            scored_recipes = []
-            for recipe in candidates:
-                score = self._calculate_recipe_score(recipe, parsed_query)
+            )
+        
+        # STEP 2: APPLY NUTRITION FILTERS (instant reject if not met)
+        nutrition_req = parsed_query.get('nutrition', {})
+        for nutrient, constraints in nutrition_req.items():
+            column = getattr(Recipe, nutrient, None)
+            if column is not None:
+                # Recipe must have nutrition data
+                query = query.filter(column.isnot(None))
                 
-                if score > 0:  # Only include recipes with positive scores
-                    recipe_dict = recipe.to_slim_dict()
-                    recipe_dict['score'] = round(score / 100.0, 3)  # Normalize to 0-1
-                    recipe_dict['rule_score'] = round(score / 100.0, 3)
-                    recipe_dict['semantic_score'] = round(score / 100.0, 3)
-                    recipe_dict['match_reasons'] = self._get_match_reasons(recipe_dict, parsed_query)
-                    recipe_dict['nutrition'] = {
-                        'calories': recipe.calories or 0,
-                        'protein': recipe.protein or 0,
-                        'fat': recipe.fat or 0,
-                        'sodium': recipe.sodium or 0,
-                        'sugar': recipe.sugar or 0,
-                        'saturates': recipe.saturates or 0
-                    }
-                    scored_recipes.append(recipe_dict)
-            
-            # STEP 6: SORT BY SCORE AND PAGINATE
-            scored_recipes.sort(key=lambda x: x['score'], reverse=True)
-            
-            # Apply offset and limit for pagination
-            start_idx = offset
-            end_idx = offset + max_results
-            return scored_recipes[start_idx:end_idx]
-            
-        finally:
-            session.close()
+                if 'min' in constraints:
+                    query = query.filter(column >= constraints['min'])
+                if 'max' in constraints:
+                    query = query.filter(column <= constraints['max'])
+        
+        # STEP 3: FILTER BY REQUIRED INGREDIENTS (must have ALL)
+        # plainto_tsquery ANDs the words of multi-word ingredients
+        # ('chicken breast'); each predicate is an index probe
+        for ingredient in required_ingredients:
+            query = query.filter(
+                Recipe.search_tsv.op('@@')(
+                    func.plainto_tsquery('english', ingredient.lower())
+                )
+            )
+
+        # STEP 4: FILTER BY DISH NAME (if specified)
+        if dish_name:
+            query = query.filter(
+                Recipe.search_tsv.op('@@')(
+                    func.plainto_tsquery('english', dish_name.lower())
+                )
+            )
+        
+        # STEP 5: SCORE IN SQL AND PAGINATE SERVER-SIDE
+        # The rank expression mirrors _calculate_recipe_score's major
+        # components; ordering and pagination happen in the database,
+        # so only the requested page crosses the wire instead of
+        # max_results*10 rows re-ranked in Python.
+        terms = self._prepare_scoring_terms(parsed_query)
+        sql_score = self._build_sql_score(terms)
+
+        rows = (
+            query.add_columns(sql_score.label('sql_score'))
+            .order_by(desc('sql_score'), Recipe.id)
+            .offset(offset)
+            .limit(max_results)
+            .all()
+        )
+
+        results = []
+        for recipe, score in rows:
+            if score <= 0:  # Only include recipes with positive scores
+                continue
+            recipe_dict = recipe.to_slim_dict()
+            recipe_dict['score'] = round(score / 100.0, 3)  # Normalize to 0-1
+            recipe_dict['rule_score'] = round(score / 100.0, 3)
+            recipe_dict['semantic_score'] = round(score / 100.0, 3)
+            # search_text is stored lowercase, so it serves directly as the
+            # match-reason text instead of rebuilding it from the dict
+            recipe_dict['match_reasons'] = self._get_match_reasons(
+                recipe_dict, parsed_query, recipe_text=recipe.search_text or ''
+            )
+            recipe_dict['nutrition'] = {
+                'calories': recipe.calories or 0,
+                'protein': recipe.protein or 0,
+                'fat': recipe.fat or 0,
+                'sodium': recipe.sodium or 0,
+                'sugar': recipe.sugar or 0,
+                'saturates': recipe.saturates or 0
+            }
+            results.append(recipe_dict)
+
+        return results
+
+    def _build_sql_score(self, terms: Dict[str, Any]):
+        """Build the SQL rank expression for database-mode search.
+
+        A sum of CASE terms matching the main _calculate_recipe_score
+        components (exact/partial dish-in-title, per-ingredient title and
+        text hits, categories, meal type, nutrition bonus). The
+        fine-grained word-position bonuses are dropped: they need the
+        split title, and their few points don't justify shipping 10x the
+        rows back for Python re-ranking.
+        """
+        from core.models import Recipe
+        from sqlalchemy import case, func, literal
+
+        def tsv_hit(term):
+            return Recipe.search_tsv.op('@@')(
+                func.plainto_tsquery('english', term)
+            )
+
+        parts = [literal(float(terms['nutrition_bonus']))]
+
+        dish = terms['dish']
+        if dish:
+            parts.append(case(
+                (Recipe.title_lower == dish, 100.0),
+                (Recipe.title_lower.contains(dish), 35.0),
+                (tsv_hit(dish), 20.0),
+                else_=0.0
+            ))
+
+        for ing in terms['ingredients']:
+            parts.append(case(
+                (Recipe.title_lower.contains(ing), 25.0),
+                else_=0.0
+            ))
+            parts.append(case((tsv_hit(ing), 10.0), else_=0.0))
+
+        for cat in terms['categories']:
+            parts.append(case((tsv_hit(cat), 12.0), else_=0.0))
+
+        if terms['meal']:
+            parts.append(case((tsv_hit(terms['meal']), 15.0), else_=0.0))
+
+        score = parts[0]
+        for part in parts[1:]:
+            score = score + part
+        return score
     
-    def _calculate_recipe_score(self, recipe, parsed_query: Dict[str, Any]) -> float:
+    def _prepare_scoring_terms(self, parsed_query: Dict[str, Any]) -> Dict[str, Any]:
+        """Lowercase the query terms once per search, not per candidate."""
+        return {
+            'dish': (parsed_query.get('dish_name') or '').lower(),
+            'ingredients': [ing.lower() for ing in parsed_query.get('ingredients') or []],
+            'categories': [cat.lower() for cat in parsed_query.get('categories') or []],
+            'meal': (parsed_query.get('meal_type') or '').lower(),
+            'nutrition_bonus': 20 * len(parsed_query.get('nutrition') or {}),
+        }
+
+    def _calculate_recipe_score(self, recipe, terms: Dict[str, Any]) -> float:
         """
         Calculate v2_enhanced style rule-based score (0-100).
-        
+
         Scoring breakdown:
         - Dish name match: up to 100 points
         - Required ingredient in title: up to 25 points each
@@ -239,147 +429,140 @@ class RecipeMatcher:
         - Category match: 12-15 points each
         - Nutrition match: 20 points per constraint
         - Combo bonus: up to 30 points
+
+        terms comes from _prepare_scoring_terms, so no query-side
+        lowering happens here; the title is split at most once.
         """
         score = 0.0
         title_lower = (recipe.title or '').lower()
-        search_text_lower = (recipe.search_text or '').lower()
-        
+        # search_text is built lowercase at migration time
+        search_text_lower = recipe.search_text or ''
+        title_words = title_lower.split()
+
+        # First position of each title word, replacing the linear
+        # membership + .index() scans in the position bonuses below
+        title_word_pos = {}
+        for pos, word in enumerate(title_words):
+            title_word_pos.setdefault(word, pos)
+
         # DISH NAME SCORING (v2_enhanced logic)
-        dish_name = parsed_query.get('dish_name')
-        if dish_name:
-            dish_lower = dish_name.lower()
-            
+        dish_lower = terms['dish']
+        if dish_lower:
             # Exact title match
             if title_lower == dish_lower:
                 score += 100
             # Whole word in title
             elif f" {dish_lower} " in f" {title_lower} ":
-                title_words = title_lower.split()
-                if dish_lower in title_words:
-                    position = title_words.index(dish_lower)
-                    if position == 0:
-                        score += 60  # First word
-                    elif position == len(title_words) - 1:
-                        score += 65  # Last word
-                    else:
-                        score += 55  # Middle
-                else:
+                position = title_word_pos.get(dish_lower)
+                if position is None:
                     score += 50
+                elif position == 0:
+                    score += 60  # First word
+                elif position == len(title_words) - 1:
+                    score += 65  # Last word
+                else:
+                    score += 55  # Middle
             # Partial match in title
             elif dish_lower in title_lower:
                 score += 35
             # In categories/text
             elif dish_lower in search_text_lower:
                 score += 20
-        
+
         # REQUIRED INGREDIENTS SCORING
-        required_ingredients = parsed_query.get('ingredients', [])
-        for ingredient in required_ingredients:
-            ing_lower = ingredient.lower()
-            
+        required_ingredients = terms['ingredients']
+        for ing_lower in required_ingredients:
             # Ingredient in title (higher value)
             if ing_lower in title_lower:
-                title_words = title_lower.split()
                 ing_score = 15
-                
+
                 # Position bonus
-                if ing_lower in title_words:
-                    position = title_words.index(ing_lower)
-                    if position == 0:
-                        ing_score += 10  # First word
-                    elif position == 1:
-                        ing_score += 8
-                    elif position == 2:
-                        ing_score += 5
-                    else:
-                        ing_score += 2
-                else:
+                position = title_word_pos.get(ing_lower)
+                if position is None:
                     ing_score += 5
-                
+                elif position == 0:
+                    ing_score += 10  # First word
+                elif position == 1:
+                    ing_score += 8
+                elif position == 2:
+                    ing_score += 5
+                else:
+                    ing_score += 2
+
                 score += ing_score
-            
+
             # Ingredient in recipe text
             if ing_lower in search_text_lower:
                 score += 10
-        
+
         # COMBO BONUS (dish + ingredients together in title)
-        if dish_name and required_ingredients:
-            dish_lower = dish_name.lower()
-            ingredients_in_title = sum(1 for ing in required_ingredients if ing.lower() in title_lower)
-            
+        if dish_lower and required_ingredients:
+            ingredients_in_title = sum(1 for ing in required_ingredients if ing in title_lower)
+
             if dish_lower in title_lower and ingredients_in_title > 0:
                 score += 20
                 # Proximity bonus
-                title_words = title_lower.split()
-                if dish_lower in title_words:
-                    for ing in required_ingredients:
-                        ing_lower = ing.lower()
-                        if ing_lower in title_words:
-                            try:
-                                dish_idx = title_words.index(dish_lower)
-                                ing_idx = title_words.index(ing_lower)
-                                distance = abs(dish_idx - ing_idx)
-                                if distance <= 2:
-                                    score += 10  # Close together
-                            except ValueError:
-                                pass
-        
+                dish_idx = title_word_pos.get(dish_lower)
+                if dish_idx is not None:
+                    for ing_lower in required_ingredients:
+                        ing_idx = title_word_pos.get(ing_lower)
+                        if ing_idx is not None and abs(dish_idx - ing_idx) <= 2:
+                            score += 10  # Close together
+
         # CATEGORY SCORING
-        categories = parsed_query.get('categories', [])
-        for category in categories:
-            cat_lower = category.lower()
+        for cat_lower in terms['categories']:
             if cat_lower in search_text_lower:
                 score += 12
-        
+
         # MEAL TYPE SCORING
-        meal_type = parsed_query.get('meal_type')
-        if meal_type and meal_type.lower() in search_text_lower:
+        if terms['meal'] and terms['meal'] in search_text_lower:
             score += 15
-        
+
         # NUTRITION SCORING (bonus for meeting requirements)
-        nutrition_req = parsed_query.get('nutrition', {})
-        if nutrition_req:
-            score += 20 * len(nutrition_req)  # Bonus for each nutrition constraint met
-        
+        score += terms['nutrition_bonus']
+
         return score
     
     def _search_memory(self, parsed_query: Dict[str, Any], max_results: int,
-                       use_tfidf: bool, query: str) -> List[Dict[str, Any]]:
+                       use_tfidf: bool, query: str,
+                       semantic_scores: np.ndarray = None) -> List[Dict[str, Any]]:
         """Search using in-memory TF-IDF (for JSON mode)."""
-        from sklearn.metrics.pairwise import cosine_similarity
-        
         # Build query string from parsed_query if not provided
         if query is None:
-            query_parts = []
-            if parsed_query.get('dish_name'):
-                query_parts.append(parsed_query['dish_name'])
-            if parsed_query.get('ingredients'):
-                query_parts.extend(parsed_query['ingredients'])
-            if parsed_query.get('categories'):
-                query_parts.extend(parsed_query['categories'])
-            query = ' '.join(query_parts) if query_parts else 'recipe'
-        
-        # Calculate scores
-        if use_tfidf and self.tfidf_vectorizer:
-            query_vector = self.tfidf_vectorizer.transform([query.lower()])
-            semantic_scores = cosine_similarity(query_vector, self.recipe_vectors).flatten()
-        else:
-            semantic_scores = np.zeros(len(self.recipes))
-        
-        rule_scores = self._calculate_rule_scores(parsed_query)
+            query = self._query_from_parsed(parsed_query)
+
+        # Calculate scores (semantic_scores may be precomputed by search_batch)
+        if semantic_scores is None:
+            if use_tfidf and self.tfidf_vectorizer:
+                query_vector = self.tfidf_vectorizer.transform([query.lower()])
+                semantic_scores = self._semantic_scores(query_vector).ravel()
+            else:
+                semantic_scores = np.zeros(len(self.recipes))
         
+        # One membership pass per distinct query term, shared by rule
+        # scoring and the constraint mask below
+        term_hits = self._term_hit_vectors(parsed_query)
+
+        rule_scores = self._calculate_rule_scores(parsed_query, term_hits)
+
         # Hybrid scoring
         if use_tfidf and self.tfidf_vectorizer:
             hybrid_scores = RULE_BASED_WEIGHT * rule_scores + TFIDF_WEIGHT * semantic_scores
         else:
             hybrid_scores = rule_scores
-        
+
         # Apply constraints
-        constraint_mask = self._apply_constraints(parsed_query)
+        constraint_mask = self._apply_constraints(parsed_query, term_hits)
         hybrid_scores = hybrid_scores * constraint_mask
         
-        # Get top results
-        top_indices = np.argsort(hybrid_scores)[::-1][:max_results * 3]
+        # Get top results: partition out the top 3K candidates in O(N),
+        # then sort only those instead of argsorting all N scores
+        k = min(max_results * 3, hybrid_scores.size)
+        if k:
+            partitioned = np.argpartition(-hybrid_scores, k - 1)[:k]
+            top_indices = partitioned[np.argsort(-hybrid_scores[partitioned])]
+        else:
+            top_indices = []
         
         results = []
         for idx in top_indices:
@@ -397,7 +580,9 @@ class RecipeMatcher:
                 'score': round(float(hybrid_scores[idx]), 3),
                 'semantic_score': round(float(semantic_scores[idx]), 3) if use_tfidf else 0,
                 'rule_score': round(float(rule_scores[idx]), 3),
-                'match_reasons': self._get_match_reasons(recipe, parsed_query),
+                'match_reasons': self._get_match_reasons(
+                    recipe, parsed_query, recipe_text=self._texts_lower[idx]
+                ),
                 'nutrition': {
                     'calories': self._safe_number(recipe.get('calories', 0)),
                     'protein': self._safe_number(recipe.get('protein', 0)),
@@ -414,103 +599,173 @@ class RecipeMatcher:
         
         return results
     
-    def _calculate_rule_scores(self, parsed_query: Dict[str, Any]) -> np.ndarray:
-        """Calculate rule-based scores for all recipes."""
-        scores = np.zeros(len(self.recipes))
-        
-        for i, recipe in enumerate(self.recipes):
-            score = 0.0
-            recipe_text = self._recipe_to_text(recipe).lower()
-            recipe_title = recipe.get('title', '').lower()
-            
-            # Dish name matching (highest weight)
-            if parsed_query.get('dish_name'):
-                dish = parsed_query['dish_name'].lower()
-                if dish in recipe_title:
-                    score += 0.4
-                elif dish in recipe_text:
-                    score += 0.2
-            
-            # Ingredient matching
-            if parsed_query.get('ingredients'):
-                matched = sum(1 for ing in parsed_query['ingredients'] if ing.lower() in recipe_text)
-                if parsed_query['ingredients']:
-                    score += 0.3 * (matched / len(parsed_query['ingredients']))
-            
-            # Category matching
-            if parsed_query.get('categories'):
-                recipe_cats = str(recipe.get('categories', '')).lower()
-                matched = sum(1 for cat in parsed_query['categories'] if cat in recipe_cats or cat in recipe_text)
-                if parsed_query['categories']:
-                    score += 0.2 * (matched / len(parsed_query['categories']))
-            
-            # Meal type matching
-            if parsed_query.get('meal_type'):
-                meal = parsed_query['meal_type'].lower()
-                if meal in recipe_text:
-                    score += 0.1
-            
-            scores[i] = score
-        
+    def _semantic_scores(self, query_vectors) -> np.ndarray:
+        """BM25 scores of query vectors against the recipe matrix.
+
+        A BM25 query scores each document as the sum of the precomputed
+        per-(term, doc) weights of its terms, so scoring is one sparse
+        matmul against a binary query indicator — work proportional to
+        the posting sizes of the query's terms, never N x |V|.
+
+        The recipe matrix is int8-quantized (see _build_tfidf_index); the
+        indicator is int32 so the matmul accumulates in int32 without
+        overflow, and the scale is divided back out. Rows are normalized
+        to [0, 1] so hybrid weighting combines them with rule scores on
+        the same footing cosine used to provide.
+        """
+        indicator = query_vectors.copy()
+        indicator.data = np.ones(indicator.data.size, dtype=np.int32)
+
+        scores = np.asarray(
+            (indicator @ self.recipe_vectors.T).todense(), dtype=np.float32
+        ) / np.float32(self._tfidf_scale)
+
+        row_max = scores.max(axis=1, keepdims=True)
+        np.divide(scores, row_max, out=scores, where=row_max > 0)
+        return scores
+
+    def _contains(self, corpus: List[str], term: str) -> np.ndarray:
+        """Boolean vector: which cached strings contain term (one pass)."""
+        return np.fromiter(
+            (term in text for text in corpus), dtype=bool, count=len(corpus)
+        )
+
+    def _term_hit_vectors(self, parsed_query: Dict[str, Any]) -> Dict[str, np.ndarray]:
+        """Membership vector per distinct query term, each built in one pass.
+
+        Collects every term the query mentions — dish name, ingredients,
+        categories, meal type and exclusions — and tests each against the
+        cached corpus exactly once. Rule scoring and the constraint mask
+        read from this dict, so a term shared between lists (or between
+        scoring and exclusion) never triggers a second corpus scan.
+        """
+        terms = set()
+        if parsed_query.get('dish_name'):
+            terms.add(parsed_query['dish_name'].lower())
+        terms.update(ing.lower() for ing in parsed_query.get('ingredients') or [])
+        terms.update(cat.lower() for cat in parsed_query.get('categories') or [])
+        if parsed_query.get('meal_type'):
+            terms.add(parsed_query['meal_type'].lower())
+        terms.update(exc.lower() for exc in parsed_query.get('excluded_ingredients') or [])
+
+        return {term: self._term_vector(term) for term in terms}
+
+    def _term_vector(self, term: str) -> np.ndarray:
+        """Bool membership vector for one term, via the inverted index.
+
+        Candidate recipes come from the posting lists of every vocabulary
+        token containing the term's words — a pass over the token
+        vocabulary rather than the corpus. A letters-only single-word
+        term can't straddle a token boundary, so its candidates are
+        exact; anything else (multi-word phrases, hyphenated terms) gets
+        a substring check against just the candidate texts, keeping the
+        results identical to a full corpus scan.
+        """
+        vector = np.zeros(len(self.recipes), dtype=bool)
+        words = re.findall(r'[a-z]+', term)
+        if not words:
+            return vector
+
+        candidates = None
+        for word in words:
+            arrays = [ids for token, ids in self._postings.items() if word in token]
+            if not arrays:
+                return vector
+            word_hits = np.unique(np.concatenate(arrays)) if len(arrays) > 1 else arrays[0]
+            if candidates is None:
+                candidates = word_hits
+            else:
+                candidates = np.intersect1d(candidates, word_hits, assume_unique=True)
+            if candidates.size == 0:
+                return vector
+
+        if len(words) > 1 or words[0] != term:
+            texts = self._texts_lower
+            candidates = np.asarray(
+                [idx for idx in candidates if term in texts[idx]], dtype=np.int32
+            )
+
+        vector[candidates] = True
+        return vector
+
+    def _calculate_rule_scores(self, parsed_query: Dict[str, Any],
+                               term_hits: Dict[str, np.ndarray]) -> np.ndarray:
+        """Calculate rule-based scores for all recipes.
+
+        Consumes the precomputed term membership vectors, accumulating
+        into a single score vector — no per-recipe text rebuilding or
+        Python-level score bookkeeping.
+        """
+        titles = self._titles_lower
+        scores = np.zeros(len(self.recipes), dtype=np.float32)
+
+        # Dish name matching (highest weight)
+        if parsed_query.get('dish_name'):
+            dish = parsed_query['dish_name'].lower()
+            in_title = self._contains(titles, dish)
+            scores += np.where(in_title, 0.4, np.where(term_hits[dish], 0.2, 0.0))
+
+        # Ingredient matching
+        ingredients = parsed_query.get('ingredients') or []
+        if ingredients:
+            per_match = 0.3 / len(ingredients)
+            for ing in ingredients:
+                scores += per_match * term_hits[ing.lower()]
+
+        # Category matching (the cached text includes categories)
+        categories = parsed_query.get('categories') or []
+        if categories:
+            per_match = 0.2 / len(categories)
+            for cat in categories:
+                scores += per_match * term_hits[cat.lower()]
+
+        # Meal type matching
+        if parsed_query.get('meal_type'):
+            scores += 0.1 * term_hits[parsed_query['meal_type'].lower()]
+
         # Normalize
-        if np.max(scores) > 0:
-            scores = scores / np.max(scores)
-        
+        max_score = scores.max() if scores.size else 0
+        if max_score > 0:
+            scores = scores / max_score
+
         return scores
     
-    def _apply_constraints(self, parsed_query: Dict[str, Any]) -> np.ndarray:
+    def _apply_constraints(self, parsed_query: Dict[str, Any],
+                           term_hits: Dict[str, np.ndarray]) -> np.ndarray:
         """Apply hard constraints (excluded ingredients and nutrition)."""
-        mask = np.ones(len(self.recipes))
-        
+        mask = np.ones(len(self.recipes), dtype=np.float32)
+
+        # Excluded ingredients: reuse the precomputed membership vectors
         excluded = parsed_query.get('excluded_ingredients', [])
+        for exc in excluded:
+            mask[term_hits[exc.lower()]] = 0
+
+        # Nutrition constraints: one vectorized comparison per bound over
+        # the columnar nutrient matrix
         nutrition_req = parsed_query.get('nutrition', {})
-        
-        for i, recipe in enumerate(self.recipes):
-            # Check excluded ingredients
-            if excluded:
-                recipe_text = self._recipe_to_text(recipe).lower()
-                for exc_ing in excluded:
-                    if exc_ing.lower() in recipe_text:
-                        mask[i] = 0
-                        break
-            
-            # Check nutrition constraints (if recipe already excluded, skip)
-            if mask[i] > 0 and nutrition_req:
-                if not self._nutrition_matches(recipe, nutrition_req):
-                    mask[i] = 0
-        
+        if nutrition_req and self.nutrient_matrix is not None:
+            for nutrient, constraints in nutrition_req.items():
+                if nutrient not in self.NUTRIENT_KEYS:
+                    continue
+                column = self.nutrient_matrix[:, self.NUTRIENT_KEYS.index(nutrient)]
+                if 'min' in constraints:
+                    mask[column < constraints['min']] = 0
+                if 'max' in constraints:
+                    mask[column > constraints['max']] = 0
+
         return mask
     
-    def _nutrition_matches(self, recipe: Dict[str, Any], nutrition_req: Dict[str, Any]) -> bool:
-        """Check if recipe meets nutritional requirements."""
-        for nutrient, constraints in nutrition_req.items():
-            recipe_value = recipe.get(nutrient)
-            
-            # If recipe doesn't have nutrition data, we can't filter - include it
-            if recipe_value is None:
-                continue
-            
-            try:
-                recipe_value = float(recipe_value)
-            except (ValueError, TypeError):
-                continue
-            
-            # Check minimum constraint (for "high protein", "high calorie")
-            if 'min' in constraints:
-                if recipe_value < constraints['min']:
-                    return False
-            
-            # Check maximum constraint (for "low calorie", "low fat")
-            if 'max' in constraints:
-                if recipe_value > constraints['max']:
-                    return False
-        
-        return True
-    
-    def _get_match_reasons(self, recipe: Dict[str, Any], parsed_query: Dict[str, Any]) -> List[str]:
-        """Generate human-readable match reasons."""
+    def _get_match_reasons(self, recipe: Dict[str, Any], parsed_query: Dict[str, Any],
+                           recipe_text: str = None) -> List[str]:
+        """Generate human-readable match reasons.
+
+        recipe_text is the cached lowercase searchable text where the
+        caller has it (JSON mode); otherwise it is built here once.
+        _recipe_to_text already lowercases, so no extra .lower() pass.
+        """
         reasons = []
-        recipe_text = self._recipe_to_text(recipe).lower()
+        if recipe_text is None:
+            recipe_text = self._recipe_to_text(recipe)
         
         if parsed_query.get('dish_name') and parsed_query['dish_name'].lower() in recipe.get('title', '').lower():
             reasons.append(f"Matches '{parsed_query['dish_name']}' dish type")
@@ -548,12 +803,14 @@ class RecipeMatcher:
         return None
     
     def get_all_categories(self) -> List[str]:
-        """Get all unique categories from the dataset."""
-        categories = set()
-        for recipe in self.recipes:
-            cats = recipe.get('categories', [])
-            if isinstance(cats, list):
-                categories.update(str(cat) for cat in cats if cat)
-            elif cats:
-                categories.add(str(cats))
-        return sorted(list(categories))
+        """Get all unique categories from the dataset (computed once)."""
+        if self._categories_cache is None:
+            categories = set()
+            for recipe in self.recipes:
+                cats = recipe.get('categories', [])
+                if isinstance(cats, list):
+                    categories.update(str(cat) for cat in cats if cat)
+                elif cats:
+                    categories.add(str(cats))
+            self._categories_cache = sorted(categories)
+        return self._categories_cache
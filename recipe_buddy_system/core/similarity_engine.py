@@ -3,26 +3,114 @@ Similarity Engine for Recipe Recommendations
 Uses TF-IDF and nutrition-based similarity
 """
 
+import os
+import re
+
 import numpy as np
 from typing import Dict, List, Any, Optional
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+
+from config.settings import DATA_DIR
 from core.models import get_session, Recipe
 
 
 class SimilarityEngine:
     """
     Find similar recipes based on ingredients, categories, and nutrition.
-    
+
     Uses hybrid approach:
     - TF-IDF for text similarity (ingredients + categories)
     - Euclidean distance for nutrition similarity
+
+    Text similarity is served from a precomputed low-rank SVD embedding of
+    the corpus TF-IDF matrix (built once, persisted to disk, memory-mapped
+    on load); the per-call TF-IDF fit remains as a fallback.
     """
-    
+
+    SVD_COMPONENTS = 128
+    SVD_IDS_PATH = os.path.join(DATA_DIR, 'similarity_svd_ids.npy')
+    SVD_MATRIX_PATH = os.path.join(DATA_DIR, 'similarity_svd_u.npy')
+
+    # Shared across instances: row-aligned recipe ids, L2-normalized fp16
+    # embeddings (memmapped), and id -> row lookup
+    _svd_ids = None
+    _svd_matrix = None
+    _svd_row = None
+
     def __init__(self):
         """Initialize the similarity engine."""
         self.session = None
-        
+        self._keywords_cache = {}
+        self._text_cache = {}
+
+    def _ensure_svd_index(self) -> bool:
+        """Load (building if necessary) the shared SVD embedding index."""
+        cls = SimilarityEngine
+        if cls._svd_matrix is not None:
+            return True
+
+        try:
+            if not (os.path.exists(cls.SVD_IDS_PATH) and os.path.exists(cls.SVD_MATRIX_PATH)):
+                self._build_svd_index()
+
+            cls._svd_ids = np.load(cls.SVD_IDS_PATH)
+            cls._svd_matrix = np.load(cls.SVD_MATRIX_PATH, mmap_mode='r')
+            cls._svd_row = {int(rid): i for i, rid in enumerate(cls._svd_ids)}
+            return True
+        except Exception as e:
+            print(f"⚠️  SVD similarity index unavailable ({e}), using per-call TF-IDF")
+            return False
+
+    def _build_svd_index(self):
+        """
+        Fit TF-IDF + truncated SVD over the whole corpus and persist the
+        normalized embeddings, so query-time similarity is one dense
+        128-wide dot product per candidate instead of a sparse TF-IDF fit.
+        """
+        from sklearn.decomposition import TruncatedSVD
+
+        print("Building SVD similarity index (one-time)...")
+
+        session = get_session()
+        try:
+            rows = session.query(
+                Recipe.id, Recipe.title, Recipe.ingredients, Recipe.categories
+            ).all()
+        finally:
+            session.close()
+
+        if not rows:
+            raise ValueError("no recipes available to index")
+
+        ids = np.array([row.id for row in rows], dtype=np.int64)
+        texts = [
+            ' '.join(
+                ([row.title] * 3 if row.title else [])
+                + (row.ingredients or [])[:10]
+                + (row.categories or [])
+            ).lower()
+            for row in rows
+        ]
+
+        vectorizer = TfidfVectorizer(
+            max_features=5000,
+            stop_words='english',
+            dtype=np.float32
+        )
+        tfidf = vectorizer.fit_transform(texts)
+
+        svd = TruncatedSVD(n_components=min(self.SVD_COMPONENTS, tfidf.shape[1] - 1))
+        embeddings = svd.fit_transform(tfidf)
+
+        # L2-normalize so a dot product equals cosine similarity
+        norms = np.linalg.norm(embeddings, axis=1)
+        norms[norms == 0] = 1.0
+        embeddings = (embeddings / norms[:, None]).astype(np.float16)
+
+        np.save(self.SVD_IDS_PATH, ids)
+        np.save(self.SVD_MATRIX_PATH, embeddings)
+        print(f"✅ SVD similarity index built ({embeddings.shape[0]:,} recipes)")
+
     def find_similar(self, recipe_id: int, limit: int = 10, 
                     min_score: float = 0.3) -> List[Dict[str, Any]]:
         """
@@ -47,11 +135,40 @@ class SimilarityEngine:
             
             # Build similarity query
             similar_recipes = self._find_similar_recipes(target_recipe, limit * 3, min_score)
-            
-            # Format results
+            top = similar_recipes[:limit]
+
+            # Candidates were loaded without their detail columns (see
+            # _get_candidate_recipes); fetch description/directions for
+            # just the returned page in one IN query instead of lazy-
+            # loading them row by row
+            details = {}
+            if top:
+                detail_rows = self.session.query(
+                    Recipe.id, Recipe.description, Recipe.directions
+                ).filter(Recipe.id.in_([recipe.id for recipe, _, _ in top])).all()
+                details = {row.id: row for row in detail_rows}
+
+            # Format results (same shape as Recipe.to_slim_dict)
             results = []
-            for recipe, similarity_score, reasons in similar_recipes[:limit]:
-                result = recipe.to_slim_dict()
+            for recipe, similarity_score, reasons in top:
+                detail = details.get(recipe.id)
+                ingredients = recipe.ingredients or []
+                directions = (detail.directions if detail else None) or []
+                categories = recipe.categories or []
+                result = {
+                    'id': recipe.id,
+                    'title': recipe.title,
+                    'desc': ((detail.description if detail else None) or recipe.title)[:150],
+                    'ingredients': ingredients[:10] if len(ingredients) > 10 else ingredients,
+                    'directions': directions[:3] if len(directions) > 3 else directions,
+                    'categories': categories[:5] if len(categories) > 5 else categories,
+                    'calories': recipe.calories or 0,
+                    'protein': recipe.protein or 0,
+                    'fat': recipe.fat or 0,
+                    'sodium': recipe.sodium or 0,
+                    'sugar': recipe.sugar or 0,
+                    'saturates': recipe.saturates or 0,
+                }
                 result['similarity_score'] = round(similarity_score, 3)
                 result['similarity_reasons'] = reasons
                 result['nutrition'] = {
@@ -63,7 +180,7 @@ class SimilarityEngine:
                     'saturates': recipe.saturates or 0
                 }
                 results.append(result)
-            
+
             return results
             
         finally:
@@ -87,42 +204,64 @@ class SimilarityEngine:
         if not candidates:
             return []
         
-        # Build text corpus for TF-IDF
+        # Text similarity: precomputed SVD embeddings when available,
+        # per-call TF-IDF fit otherwise
+        text_similarities = self._text_similarities(target, candidates)
+        
+        # Calculate nutrition similarity
+        nutrition_similarities = self._calculate_nutrition_similarity(target, candidates)
+        
+        # Combine scores (70% text, 30% nutrition)
+        combined_scores = 0.7 * text_similarities + 0.3 * nutrition_similarities
+
+        # Threshold and rank in NumPy, then build tuples for only the top
+        # `limit` survivors — reason generation (the Python-heavy part)
+        # no longer runs for candidates the caller will never return
+        qualifying = np.flatnonzero(combined_scores >= min_score)
+        ranked = qualifying[np.argsort(-combined_scores[qualifying])][:limit]
+
+        return [
+            (
+                candidates[i],
+                float(combined_scores[i]),
+                self._generate_similarity_reasons(
+                    target, candidates[i], text_similarities[i], nutrition_similarities[i]
+                ),
+            )
+            for i in ranked
+        ]
+    
+    def _text_similarities(self, target: Recipe, candidates: List[Recipe]) -> np.ndarray:
+        """Text similarity of each candidate to the target (0-1)."""
+        cls = SimilarityEngine
+
+        if self._ensure_svd_index() and target.id in cls._svd_row:
+            target_vec = cls._svd_matrix[cls._svd_row[target.id]].astype(np.float32)
+            rows = np.array([cls._svd_row.get(r.id, -1) for r in candidates])
+            similarities = cls._svd_matrix[rows].astype(np.float32) @ target_vec
+            similarities[rows < 0] = 0.0
+            return np.maximum(similarities, 0.0)
+
+        # Fallback: fit TF-IDF over target + candidates for this call
         target_text = self._recipe_to_text(target)
         candidate_texts = [self._recipe_to_text(r) for r in candidates]
         all_texts = [target_text] + candidate_texts
-        
-        # Calculate TF-IDF similarity
+
         vectorizer = TfidfVectorizer(
             max_features=1000,
             ngram_range=(1, 2),
             stop_words='english',
-            min_df=1
+            min_df=1,
+            dtype=np.float32
         )
-        
+
+        # TfidfVectorizer rows are already L2-normalized, so the plain
+        # sparse dot is cosine — no renormalization passes
         tfidf_matrix = vectorizer.fit_transform(all_texts)
-        text_similarities = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:])[0]
-        
-        # Calculate nutrition similarity
-        nutrition_similarities = self._calculate_nutrition_similarity(target, candidates)
-        
-        # Combine scores (70% text, 30% nutrition)
-        combined_scores = 0.7 * text_similarities + 0.3 * nutrition_similarities
-        
-        # Build results with reasons
-        results = []
-        for i, recipe in enumerate(candidates):
-            if combined_scores[i] >= min_score:
-                reasons = self._generate_similarity_reasons(
-                    target, recipe, text_similarities[i], nutrition_similarities[i]
-                )
-                results.append((recipe, combined_scores[i], reasons))
-        
-        # Sort by similarity score
-        results.sort(key=lambda x: x[1], reverse=True)
-        
-        return results
-    
+        return np.asarray(
+            (tfidf_matrix[0:1] @ tfidf_matrix[1:].T).todense()
+        ).ravel()
+
     def _get_candidate_recipes(self, target: Recipe, limit: int) -> List[Recipe]:
         """
         Get candidate recipes that might be similar.
@@ -132,32 +271,46 @@ class SimilarityEngine:
         - Similar nutrition profile (±50% calories)
         - Exclude the target recipe itself
         """
-        from sqlalchemy import or_, func
-        
+        from sqlalchemy import func, desc
+        from sqlalchemy.orm import load_only
+
         # Extract key ingredients (first 5 main ingredients)
         target_ingredients = target.ingredients[:5] if target.ingredients else []
-        
-        # Build ingredient search patterns
+
+        # Build ingredient search words (letters only, so they are safe
+        # inside a to_tsquery expression; skip measurements)
         ingredient_patterns = []
         for ing in target_ingredients:
-            # Extract main ingredient words (skip measurements)
-            words = ing.lower().split()
-            main_words = [w for w in words if len(w) > 3 and not w[0].isdigit()]
+            main_words = [w for w in re.findall(r'[a-z]+', ing.lower()) if len(w) > 3]
             ingredient_patterns.extend(main_words[:2])
-        
+
         # Remove duplicates
         ingredient_patterns = list(set(ingredient_patterns))[:10]
-        
-        query = self.session.query(Recipe).filter(Recipe.id != target.id)
-        
-        # Filter by shared ingredients (using search_text)
+
+        # Project only the columns scoring needs — hydrating full rows
+        # drags the bulky directions arrays over the wire for every
+        # candidate; the returned page fetches its details separately
+        query = (
+            self.session.query(Recipe)
+            .options(load_only(
+                Recipe.id, Recipe.title, Recipe.ingredients, Recipe.categories,
+                Recipe.calories, Recipe.protein, Recipe.fat,
+                Recipe.sodium, Recipe.sugar, Recipe.saturates
+            ))
+            .filter(Recipe.id != target.id)
+        )
+
+        # Filter by shared ingredients: one OR-of-terms tsquery probed
+        # against the GIN-indexed tsvector (a LIKE '%...%' per word can't
+        # use any index), ranked server-side so the best-overlapping
+        # candidates survive the limit instead of an arbitrary subset
         if ingredient_patterns:
-            ingredient_filters = [
-                func.lower(Recipe.search_text).like(f'%{pattern}%')
-                for pattern in ingredient_patterns
-            ]
-            query = query.filter(or_(*ingredient_filters))
-        
+            tsquery = func.to_tsquery('english', ' | '.join(ingredient_patterns))
+            query = (
+                query.filter(Recipe.search_tsv.op('@@')(tsquery))
+                .order_by(desc(func.ts_rank(Recipe.search_tsv, tsquery)))
+            )
+
         # Filter by similar calorie range (±50%)
         if target.calories and target.calories > 0:
             min_cal = target.calories * 0.5
@@ -165,29 +318,40 @@ class SimilarityEngine:
             query = query.filter(
                 Recipe.calories.between(min_cal, max_cal)
             )
-        
+
         # Get candidates
         candidates = query.limit(limit).all()
-        
+
         return candidates
     
     def _recipe_to_text(self, recipe: Recipe) -> str:
-        """Convert recipe to searchable text."""
+        """Convert recipe to searchable text.
+
+        Memoized per recipe id (like _recipe_keywords): popular recipes
+        recur as candidates across find_similar calls, and recipe rows
+        are immutable after migration.
+        """
+        text = self._text_cache.get(recipe.id)
+        if text is not None:
+            return text
+
         parts = []
-        
+
         # Title (weighted heavily)
         if recipe.title:
             parts.extend([recipe.title] * 3)
-        
+
         # Ingredients
         if recipe.ingredients:
             parts.extend(recipe.ingredients[:10])
-        
+
         # Categories
         if recipe.categories:
             parts.extend(recipe.categories)
-        
-        return ' '.join(parts).lower()
+
+        text = ' '.join(parts).lower()
+        self._text_cache[recipe.id] = text
+        return text
     
     def _calculate_nutrition_similarity(self, target: Recipe, 
                                        candidates: List[Recipe]) -> np.ndarray:
@@ -197,53 +361,62 @@ class SimilarityEngine:
         Considers: calories, protein, fat, sodium
         Returns: Similarity scores (0-1, higher is more similar)
         """
-        # Extract nutrition vectors
-        target_nutrition = self._get_nutrition_vector(target)
-        candidate_nutritions = np.array([
-            self._get_nutrition_vector(r) for r in candidates
-        ])
-        
-        # Calculate Euclidean distances
-        distances = np.linalg.norm(candidate_nutritions - target_nutrition, axis=1)
-        
+        # Fill one preallocated (n, 4) float32 block instead of stacking a
+        # per-recipe array per candidate
+        target_nutrition = np.asarray(self._get_nutrition_vector(target), dtype=np.float32)
+        candidate_nutritions = np.empty((len(candidates), 4), dtype=np.float32)
+        for i, recipe in enumerate(candidates):
+            candidate_nutritions[i] = self._get_nutrition_vector(recipe)
+
+        # Squared Euclidean distance via einsum fuses the square and the
+        # reduction in one pass — no intermediate squared array
+        diff = candidate_nutritions - target_nutrition
+        distances = np.sqrt(np.einsum('ij,ij->i', diff, diff))
+
         # Convert distances to similarities (0-1 scale)
         # Using exponential decay: similarity = exp(-distance / scale)
         scale = 100.0  # Tune this based on typical nutrition ranges
         similarities = np.exp(-distances / scale)
-        
+
         return similarities
-    
-    def _get_nutrition_vector(self, recipe: Recipe) -> np.ndarray:
-        """Get normalized nutrition vector for similarity calculation."""
-        return np.array([
+
+    def _get_nutrition_vector(self, recipe: Recipe) -> tuple:
+        """Get normalized nutrition values for similarity calculation."""
+        return (
             recipe.calories or 0,
             (recipe.protein or 0) * 10,     # Scale protein (grams are smaller than calories)
             (recipe.fat or 0) * 10,         # Scale fat
             (recipe.sodium or 0) / 10       # Scale down sodium (mg are larger)
-        ])
+        )
     
+    def _recipe_keywords(self, recipe: Recipe) -> frozenset:
+        """Meaningful ingredient words for a recipe, tokenized once.
+
+        Memoized per recipe id: the target recurs across every candidate
+        pair and popular candidates recur across calls.
+        """
+        keywords = self._keywords_cache.get(recipe.id)
+        if keywords is None:
+            keywords = frozenset(
+                word
+                for ing in (recipe.ingredients or [])
+                for word in ing.lower().split()
+                if len(word) > 3 and not word[0].isdigit()
+            )
+            self._keywords_cache[recipe.id] = keywords
+        return keywords
+
     def _generate_similarity_reasons(self, target: Recipe, candidate: Recipe,
                                     text_sim: float, nutrition_sim: float) -> List[str]:
         """Generate human-readable reasons for similarity."""
         reasons = []
         
-        # Check ingredient overlap
+        # Check ingredient overlap: one flat keyword set per recipe
+        # (cached), intersected in C — not a per-pair split-and-compare
         if target.ingredients and candidate.ingredients:
-            target_ings = set([ing.lower() for ing in target.ingredients])
-            candidate_ings = set([ing.lower() for ing in candidate.ingredients])
-            
-            # Find common ingredient keywords
-            common_keywords = []
-            for t_ing in target_ings:
-                for c_ing in candidate_ings:
-                    t_words = set(t_ing.split())
-                    c_words = set(c_ing.split())
-                    common = t_words & c_words
-                    # Filter meaningful words
-                    common = {w for w in common if len(w) > 3 and not w[0].isdigit()}
-                    common_keywords.extend(common)
-            
-            common_keywords = list(set(common_keywords))[:3]
+            common_keywords = sorted(
+                self._recipe_keywords(target) & self._recipe_keywords(candidate)
+            )[:3]
             if common_keywords:
                 reasons.append(f"Shares ingredients: {', '.join(common_keywords)}")
         
@@ -3,73 +3,162 @@ Spell Correction Module (V2 Feature)
 Handles typos in user queries
 """
 
+import functools
+
+from array import array
 from typing import List, Tuple
+
 from spellchecker import SpellChecker
-from config.vocabulary import SPELL_CHECK_WORDS
+from config.vocabulary import SPELL_CHECK_WORDS, build_spell_trie
+
+# First corrector instance, backing the OOV cache below (all instances
+# share the same trie and SpellChecker, so results are identical)
+_corrector = None
+
+
+@functools.lru_cache(maxsize=4096)
+def _correct_oov(word: str) -> str:
+    """Resolve an out-of-vocabulary word, memoized — typos repeat."""
+    trie_hits = _corrector._trie_suggest(word, max_dist=2)
+    if trie_hits:
+        return trie_hits[0][1]
+    return _corrector.spell.correction(word) or word
 
 
 class SpellCorrector:
     """
     Spell correction for recipe queries.
-    
+
     Fixes typos like:
     - "chiken" → "chicken"
     - "recipie" → "recipe"
     - "tomatoe" → "tomato"
+
+    Food-vocabulary typos are resolved via a trie with edit-distance
+    pruning (subtrees whose DP row exceeds the threshold are skipped),
+    falling back to pyspellchecker for general-English words.
     """
-    
+
+    # Shared across instances: the vocabulary is a module constant
+    _trie = build_spell_trie()
+
+    # Shared SpellChecker: constructing one parses the bundled English
+    # frequency dictionary from disk, which is far too expensive to
+    # repeat per instantiation
+    _shared_spell = None
+
+    # Frozen copy of the dictionary's keys: membership is one hash probe
+    # instead of going through SpellChecker's __contains__ layers
+    _vocab = None
+
     def __init__(self):
         """Initialize spell checker with food vocabulary."""
-        self.spell = SpellChecker()
-        self.spell.word_frequency.load_words(SPELL_CHECK_WORDS)
-    
+        if SpellCorrector._shared_spell is None:
+            spell = SpellChecker()
+            spell.word_frequency.load_words(SPELL_CHECK_WORDS)
+            SpellCorrector._shared_spell = spell
+            SpellCorrector._vocab = frozenset(spell.word_frequency.dictionary.keys())
+        self.spell = SpellCorrector._shared_spell
+        self._vocab = SpellCorrector._vocab
+
+        global _corrector
+        if _corrector is None:
+            _corrector = self
+
     def correct(self, query: str) -> Tuple[str, List[Tuple[str, str]]]:
         """
         Correct spelling in a query.
-        
+
         Args:
             query: User's raw query text
-            
+
         Returns:
             (corrected_query, list of (original, corrected) pairs)
         """
         words = query.split()
         corrected_words = []
         corrections = []
-        
+
         for word in words:
             clean_word = word.lower().strip('.,!?')
-            
+
             # Skip very short words or numbers
             if len(clean_word) <= 2 or clean_word.isdigit():
                 corrected_words.append(word)
                 continue
-            
+
             # Check if misspelled
-            if clean_word in self.spell:
+            if clean_word in self._vocab:
                 corrected_words.append(word)
             else:
-                corrected = self.spell.correction(clean_word)
-                if corrected and corrected != clean_word:
+                # Cached OOV resolution: food-trie lookup first (pruned DP
+                # over ~100 words beats pyspellchecker's candidate
+                # generation), general-English correction as fallback
+                corrected = _correct_oov(clean_word)
+
+                if corrected != clean_word:
                     corrected_words.append(corrected)
                     corrections.append((word, corrected))
                 else:
                     corrected_words.append(word)
-        
+
         return ' '.join(corrected_words), corrections
-    
+
     def suggest(self, word: str, max_suggestions: int = 3) -> List[str]:
         """
         Get spelling suggestions for a word.
-        
+
         Args:
             word: Word to get suggestions for
             max_suggestions: Maximum number of suggestions
-            
+
         Returns:
             List of suggested corrections
         """
-        candidates = self.spell.candidates(word.lower())
+        clean_word = word.lower()
+
+        trie_hits = self._trie_suggest(clean_word, max_dist=2)
+        if trie_hits:
+            return [candidate for _, candidate in trie_hits[:max_suggestions]]
+
+        candidates = self.spell.candidates(clean_word)
         if candidates:
             return list(candidates)[:max_suggestions]
         return []
+
+    def _trie_suggest(self, word: str, max_dist: int = 2) -> List[Tuple[int, str]]:
+        """
+        Find food-vocabulary words within max_dist edits of word.
+
+        Runs the classic trie + Levenshtein-DP search: one DP row per trie
+        node, recursing into a child only while the row minimum is still
+        within the threshold. Returns (distance, word) pairs, best first.
+        """
+        results = []
+        first_row = array('i', range(len(word) + 1))
+
+        for char, child in self._trie.items():
+            if char != '$':
+                self._search_trie(child, char, char, word, first_row, max_dist, results)
+
+        results.sort()
+        return results
+
+    def _search_trie(self, node, char, prefix, word, prev_row, max_dist, results):
+        """Extend the DP by one character and recurse while promising."""
+        row = array('i', [prev_row[0] + 1])
+        for col in range(1, len(word) + 1):
+            row.append(min(
+                row[col - 1] + 1,                               # insertion
+                prev_row[col] + 1,                              # deletion
+                prev_row[col - 1] + (word[col - 1] != char)     # substitution
+            ))
+
+        if '$' in node and row[-1] <= max_dist:
+            results.append((row[-1], prefix))
+
+        if min(row) <= max_dist:
+            for next_char, child in node.items():
+                if next_char != '$':
+                    self._search_trie(child, next_char, prefix + next_char,
+                                      word, row, max_dist, results)
@@ -0,0 +1,43 @@
+"""
+Gunicorn configuration for Recipe Buddy API
+
+Endpoints are I/O-bound (PostgreSQL, Redis), so threaded workers sized
+to the host CPU give near-linear throughput scaling. Override with
+WEB_CONCURRENCY / GUNICORN_THREADS where the platform constrains memory.
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8080')}"
+
+workers = int(os.environ.get('WEB_CONCURRENCY', 2 * (os.cpu_count() or 1)))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+
+timeout = 120
+
+# Load the app (recipes, TF-IDF index, NLP model) once in the master so
+# forked workers share it copy-on-write instead of loading per worker.
+preload_app = True
+
+
+def post_fork(server, worker):
+    """Reseed the NumPy Generators that preloading clones into workers.
+
+    With preload_app the master builds api.recipe_routes._rng (at
+    import) and the meal planner's rng (during create_app) before
+    forking, so every worker inherits identical Generator state and
+    /api/recipe/random and meal-plan variety sampling replay the same
+    sequence in each process. Fresh default_rng() per worker draws new
+    OS entropy.
+    """
+    import sys
+    import numpy as np
+
+    recipe_routes = sys.modules.get('api.recipe_routes')
+    if recipe_routes is not None:
+        recipe_routes._rng = np.random.default_rng()
+
+    features = sys.modules.get('api.features')
+    if features is not None and features.meal_planner is not None:
+        features.meal_planner.rng = np.random.default_rng()
@@ -13,17 +13,66 @@ This script:
     4. Creates search indexes
 """
 
+import itertools
 import json
 import gzip
+import multiprocessing
 import os
+import re
 import sys
-from typing import Dict, Any, List
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from psycopg2.extras import execute_values
 from sqlalchemy import text
-from core.models import Recipe, Base, get_engine, get_session
+from config.vocabulary import MEAL_TYPES
+from core.models import Recipe, Base, get_engine, get_session, main_ingredient_hashes
+
+# Column order for the bulk INSERT; must match the keys produced by
+# preprocess_recipe. search_text is a stored generated column and
+# search_tsv is populated by the one-time UPDATE before index creation,
+# so neither is sent.
+INSERT_COLUMNS = (
+    'id', 'title', 'title_lower', 'description', 'ingredients',
+    'directions', 'categories', 'calories', 'protein', 'fat', 'sodium',
+    'sugar', 'saturates', 'meal_type', 'is_vegetarian',
+    'ingredient_tags', 'ingredient_hashes'
+)
+
+INSERT_SQL = (
+    f"INSERT INTO recipes ({', '.join(INSERT_COLUMNS)}) VALUES %s"
+)
+
+# Classification order when a recipe matches several meal-type keywords
+MEAL_TYPE_PRIORITY = ('breakfast', 'lunch', 'dinner', 'snack', 'dessert', 'drink')
+
+VEGETARIAN_MARKERS = ('vegetarian', 'vegan', 'meatless')
+
+
+def classify_meal_type(search_text: str) -> Optional[str]:
+    """Pick the recipe's meal type from its search text, or None."""
+    for meal_type in MEAL_TYPE_PRIORITY:
+        if any(kw in search_text for kw in MEAL_TYPES[meal_type]):
+            return meal_type
+    return None
+
+
+def extract_ingredient_tags(ingredients: List[str]) -> List[str]:
+    """Lowercased words from the ingredient lines, for overlap filters.
+
+    Plural words also contribute their singular form so an exclusion like
+    'almond' still matches '2 cups almonds'.
+    """
+    tags = set()
+    for ing in ingredients:
+        for word in re.findall(r'[a-z]+', ing.lower()):
+            if len(word) >= 3:
+                tags.add(word[:40])
+                if word.endswith('s') and len(word) > 3:
+                    tags.add(word[:-1][:40])
+    return sorted(tags)
 
 
 def preprocess_recipe(recipe: Dict[str, Any], idx: int) -> Dict[str, Any]:
@@ -80,16 +129,19 @@ def preprocess_recipe(recipe: Dict[str, Any], idx: int) -> Dict[str, Any]:
         else:
             calories = protein = fat = sodium = sugar = saturates = 0
     
-    # Build search text
+    # Build search text for the classifiers below. The database column is
+    # a stored generated column with the same construction, so this local
+    # copy is never sent over the wire.
     title = recipe.get('title', '')
     search_parts = [title, title]  # Double weight title
     search_parts.extend(ingredients)
     search_parts.extend(recipe.get('categories', []))
     search_text = ' '.join(str(p).lower() for p in search_parts)
-    
+
     return {
         'id': idx + 1,  # Use sequential ID
         'title': title,
+        'title_lower': title.lower(),
         'description': recipe.get('desc', title),
         'ingredients': ingredients,
         'directions': directions,
@@ -100,10 +152,78 @@ def preprocess_recipe(recipe: Dict[str, Any], idx: int) -> Dict[str, Any]:
         'sodium': sodium,
         'sugar': sugar,
         'saturates': saturates,
-        'search_text': search_text
+        'meal_type': classify_meal_type(search_text),
+        'is_vegetarian': any(m in search_text for m in VEGETARIAN_MARKERS),
+        'ingredient_tags': extract_ingredient_tags(ingredients),
+        'ingredient_hashes': main_ingredient_hashes(ingredients)
     }
 
 
+def _preprocess_batch(job: Tuple[int, List[Dict[str, Any]]]) -> List[tuple]:
+    """Preprocess one (start_index, raw_batch) job into insert tuples.
+
+    Top-level so it pickles for the worker pool; returns tuples in
+    INSERT_COLUMNS order ready for execute_values.
+    """
+    start, batch = job
+    rows = []
+    for j, raw in enumerate(batch):
+        processed = preprocess_recipe(raw, start + j)
+        rows.append(tuple(processed[col] for col in INSERT_COLUMNS))
+    return rows
+
+
+def iter_recipe_json(source_path: str) -> Iterator[Dict[str, Any]]:
+    """Stream recipe objects from the (optionally gzipped) JSON array.
+
+    json.load materializes the whole corpus (~hundreds of MB of dicts)
+    before the first insert. This walks the array with the stdlib
+    incremental decoder instead, yielding one recipe at a time, so peak
+    memory is one batch rather than the entire file.
+    """
+    decoder = json.JSONDecoder()
+    opener = gzip.open if source_path.endswith('.gz') else open
+
+    with opener(source_path, 'rt', encoding='utf-8') as f:
+        buf = ''
+        pos = 0
+        started = False
+        while True:
+            # Skip whitespace and array punctuation before the next value
+            while True:
+                while pos < len(buf) and buf[pos] in ' \t\r\n,':
+                    pos += 1
+                if pos < len(buf):
+                    break
+                chunk = f.read(65536)
+                if not chunk:
+                    return
+                buf = buf[pos:] + chunk
+                pos = 0
+
+            char = buf[pos]
+            if char == '[' and not started:
+                started = True
+                pos += 1
+                continue
+            if char == ']':
+                return
+
+            # Decode one object, pulling more input on truncation
+            while True:
+                try:
+                    obj, end = decoder.raw_decode(buf, pos)
+                    yield obj
+                    buf = buf[end:]
+                    pos = 0
+                    break
+                except json.JSONDecodeError:
+                    chunk = f.read(65536)
+                    if not chunk:
+                        raise
+                    buf += chunk
+
+
 def migrate():
     """Run the migration."""
     
@@ -141,39 +261,55 @@ def migrate():
     Base.metadata.create_all(engine)
     print("✅ Tables created")
     
-    # Load JSON
-    print("\n📖 Loading recipes from JSON...")
-    if source_path.endswith('.gz'):
-        with gzip.open(source_path, 'rt', encoding='utf-8') as f:
-            raw_recipes = json.load(f)
-    else:
-        with open(source_path, 'r', encoding='utf-8') as f:
-            raw_recipes = json.load(f)
-    
-    print(f"📋 Found {len(raw_recipes):,} recipes")
-    
-    # Insert in batches
+    # Insert in batches, streaming the JSON so the whole corpus is never
+    # resident at once (the total isn't known until the stream ends).
+    # Rows go through psycopg2's execute_values on a raw connection —
+    # one multi-row INSERT per batch, no ORM instrumentation or
+    # identity-map bookkeeping per recipe.
     print("\n💾 Inserting recipes into PostgreSQL...")
     session = get_session()
-    
+
     batch_size = 500
-    total = len(raw_recipes)
     inserted = 0
-    
+    raw_conn = engine.raw_connection()
+
+    def batch_jobs() -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+        recipes_iter = iter_recipe_json(source_path)
+        start = 0
+        while True:
+            batch = list(itertools.islice(recipes_iter, batch_size))
+            if not batch:
+                return
+            yield start, batch
+            start += len(batch)
+
     try:
-        for i in range(0, total, batch_size):
-            batch = raw_recipes[i:i + batch_size]
-            
-            for j, raw_recipe in enumerate(batch):
-                processed = preprocess_recipe(raw_recipe, i + j)
-                recipe = Recipe(**processed)
-                session.add(recipe)
-            
-            session.commit()
-            inserted += len(batch)
-            
-            progress = (inserted / total) * 100
-            print(f"  Progress: {inserted:,}/{total:,} ({progress:.1f}%)")
+        cursor = raw_conn.cursor()
+
+        # One-shot load: skip WAL while inserting. UNLOGGED tables are
+        # truncated on crash recovery, which is fine here — a failed
+        # migration is simply re-run. SET LOGGED below rewrites the table
+        # into the WAL once, which is far cheaper than logging every row.
+        # synchronous_commit=off additionally drops the per-commit flush
+        # wait; the final SET LOGGED commit is durable regardless.
+        cursor.execute("ALTER TABLE recipes SET UNLOGGED")
+        cursor.execute("SET synchronous_commit = off")
+        raw_conn.commit()
+
+        # Preprocessing is pure Python string work; run it in a worker
+        # pool so it overlaps with the INSERT round trips. imap keeps
+        # batch order (IDs are sequential) and bounds the rows in flight.
+        with multiprocessing.Pool(os.cpu_count()) as pool:
+            for rows in pool.imap(_preprocess_batch, batch_jobs()):
+                execute_values(cursor, INSERT_SQL, rows, page_size=batch_size)
+                raw_conn.commit()
+                inserted += len(rows)
+                print(f"  Progress: {inserted:,} recipes inserted")
+
+        # Back to durable before any index work
+        cursor.execute("ALTER TABLE recipes SET LOGGED")
+        raw_conn.commit()
+        cursor.close()
         
         print(f"\n✅ Inserted {inserted:,} recipes")
         
@@ -192,11 +328,16 @@ def migrate():
         session.execute(text("CREATE INDEX IF NOT EXISTS idx_recipe_title ON recipes (title)"))
         session.execute(text("CREATE INDEX IF NOT EXISTS idx_recipe_calories ON recipes (calories)"))
         session.execute(text("CREATE INDEX IF NOT EXISTS idx_recipe_protein ON recipes (protein)"))
-        session.execute(text("CREATE INDEX IF NOT EXISTS idx_recipe_search_text ON recipes USING gin(to_tsvector('english', search_text))"))
+        # Populate the stored tsvector (recipes are read-only afterwards,
+        # so no trigger is needed) and index the column directly
+        session.execute(text("UPDATE recipes SET search_tsv = to_tsvector('english', search_text)"))
+        session.execute(text("CREATE INDEX IF NOT EXISTS idx_recipe_search_tsv ON recipes USING gin(search_tsv)"))
+        session.execute(text("CREATE INDEX IF NOT EXISTS idx_recipe_categories ON recipes USING gin(categories)"))
+        session.execute(text("CREATE INDEX IF NOT EXISTS idx_recipe_ing_tags ON recipes USING gin(ingredient_tags)"))
         
         # Trigram index for similarity search
         try:
-            session.execute(text("CREATE INDEX IF NOT EXISTS idx_recipe_title_trgm ON recipes USING gin(title gin_trgm_ops)"))
+            session.execute(text("CREATE INDEX IF NOT EXISTS idx_recipe_title_trgm ON recipes USING gin(title_lower gin_trgm_ops)"))
             session.execute(text("CREATE INDEX IF NOT EXISTS idx_recipe_search_trgm ON recipes USING gin(search_text gin_trgm_ops)"))
             print("✅ Trigram indexes created (similarity search enabled)")
         except Exception as e:
@@ -204,16 +345,46 @@ def migrate():
         
         session.commit()
         print("✅ Indexes created")
+
+        # Materialized view backing GET /categories. Recipes are read-only
+        # after migration, so building it here is the only refresh needed.
+        print("\n🔍 Creating category materialized view...")
+        try:
+            session.execute(text("DROP MATERIALIZED VIEW IF EXISTS recipe_category_counts"))
+            session.execute(text("""
+                CREATE MATERIALIZED VIEW recipe_category_counts AS
+                SELECT category, COUNT(*) AS count
+                FROM recipes, unnest(categories) AS category
+                GROUP BY category
+                ORDER BY count DESC
+            """))
+            session.commit()
+            print("✅ Category materialized view created")
+        except Exception as e:
+            print(f"⚠️ Could not create category materialized view: {e}")
+            session.rollback()
         
+        # Persist the similarity embedding index now, while we're offline,
+        # so the first /similar request serves from disk instead of paying
+        # the corpus-wide TF-IDF + SVD fit
+        print("\n🔍 Building similarity embedding index...")
+        try:
+            from core.similarity_engine import SimilarityEngine
+            SimilarityEngine()._build_svd_index()
+        except Exception as e:
+            print(f"⚠️ Could not build similarity index: {e}")
+
         # Verify
         count = session.query(Recipe).count()
         print(f"\n✅ Migration complete! {count:,} recipes in database")
         
     except Exception as e:
+        raw_conn.rollback()
         session.rollback()
         print(f"\n❌ Error: {e}")
         raise
     finally:
+        raw_conn.close()
         session.close()
 
 
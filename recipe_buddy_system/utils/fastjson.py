@@ -0,0 +1,39 @@
+"""
+Fast JSON serialization helpers
+Uses orjson (C encoder, no ensure_ascii re-escaping) when available,
+falling back to the standard library.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps_bytes(obj) -> bytes:
+    """Serialize an object to UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj).encode('utf-8')
+
+
+def loads(data):
+    """Deserialize JSON from bytes or str."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_response(obj, status: int = 200):
+    """
+    Build a Flask JSON response via the fast serializer.
+
+    Skips jsonify's provider indirection and stdlib encoding on the hot
+    response path. Error paths keep jsonify for consistency.
+    """
+    from flask import current_app
+    return current_app.response_class(
+        dumps_bytes(obj), status=status, mimetype='application/json'
+    )
@@ -17,9 +17,13 @@ Requires:
 from __future__ import annotations
 
 import argparse
+import functools
 import json
+import operator
 import os
 import sys
+
+import numpy as np
 from datetime import datetime, timezone
 from dataclasses import dataclass
 from typing import Any, Dict, List, Optional, Tuple
@@ -29,6 +33,11 @@ sys.path.insert(0, REPO_ROOT)
 
 from core import QueryParser, RecipeMatcher, load_recipes  # noqa: E402
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 @dataclass(frozen=True)
 class FilterEval:
@@ -36,66 +45,210 @@ class FilterEval:
     reasons: List[str]
 
 
-def _like_contains(haystack: str, needle: str) -> bool:
-    return needle.lower() in (haystack or "").lower()
+@dataclass(frozen=True)
+class RecipeView:
+    """Precomputed lowercase strings and title tokens for one recipe.
+
+    evaluate_hard_filters and score_breakdown both probe the same
+    lowered title/search_text repeatedly; lowering them once here (the
+    search_text pass is the dominant per-recipe string cost) and
+    tokenizing the title once replaces per-check .lower()/.split() work.
+    """
+
+    recipe: Any
+    title_lower: str
+    search_text_lower: str
+    text_token_set: frozenset
+    title_words: List[str]
+    title_word_set: frozenset
+    title_word_index: Dict[str, int]
+
+    @classmethod
+    def from_recipe(cls, recipe) -> "RecipeView":
+        title_lower = (recipe.title or "").lower()
+        title_words = title_lower.split()
+        search_text_lower = (recipe.search_text or "").lower()
+        # First position of each word, matching list.index() semantics
+        word_index: Dict[str, int] = {}
+        for pos, word in enumerate(title_words):
+            word_index.setdefault(word, pos)
+        return cls(
+            recipe=recipe,
+            title_lower=title_lower,
+            search_text_lower=search_text_lower,
+            text_token_set=frozenset(search_text_lower.split()),
+            title_words=title_words,
+            title_word_set=frozenset(word_index),
+            title_word_index=word_index,
+        )
+
 
+@dataclass(frozen=True)
+class NormalizedQuery:
+    """Parsed query with every term lowered and every bound cast once.
+
+    The filter and scoring functions run per recipe; lowering the query
+    terms there repeated O(query) string work for each of the R rows.
+    """
+
+    excluded: Tuple[str, ...]
+    required: Tuple[str, ...]
+    categories: Tuple[str, ...]
+    dish: Optional[str]
+    meal_type: Optional[str]
+    nutrition: Dict[str, Dict[str, float]]
+
+
+def normalize_parsed(parsed: Dict[str, Any]) -> NormalizedQuery:
+    """Lowercase the parsed query's terms and pre-cast nutrition bounds."""
+    nutrition: Dict[str, Dict[str, float]] = {}
+    for nutrient, constraints in (parsed.get("nutrition") or {}).items():
+        bounds: Dict[str, float] = {}
+        if "min" in constraints:
+            bounds["min"] = float(constraints["min"])
+        if "max" in constraints:
+            bounds["max"] = float(constraints["max"])
+        nutrition[nutrient] = bounds
+
+    dish_name = parsed.get("dish_name")
+    meal_type = parsed.get("meal_type")
+    return NormalizedQuery(
+        excluded=tuple((e or "").lower() for e in parsed.get("excluded_ingredients") or [] if e),
+        required=tuple((i or "").lower() for i in parsed.get("ingredients") or [] if i),
+        categories=tuple((c or "").lower() for c in parsed.get("categories") or [] if c),
+        dish=dish_name.lower() if dish_name else None,
+        meal_type=meal_type.lower() if meal_type else None,
+        nutrition=nutrition,
+    )
+
+
+# C-level accessors for the closed set of nutrition columns; beats a
+# string getattr per row and doubles as validation of the nutrient name
+_NUTRIENT_GET = {
+    name: operator.attrgetter(name)
+    for name in ('calories', 'protein', 'fat', 'sodium', 'sugar', 'saturates')
+}
+
+
+def batch_nutrition_failures(rows: List[Any], parsed: NormalizedQuery) -> List[Optional[str]]:
+    """First failing nutrition reason per row, or None, evaluated in bulk.
+
+    Replaces the per-recipe Python min/max loop with one vectorized
+    comparison per constraint over all fetched rows; reason strings are
+    only built for the (few) failing rows. Preserves the per-recipe
+    first-failure semantics by walking constraints in query order.
+    """
+    failures: List[Optional[str]] = [None] * len(rows)
+    if not parsed.nutrition or not rows:
+        return failures
+
+    for nutrient, constraints in parsed.nutrition.items():
+        get = _NUTRIENT_GET.get(nutrient)
+        if get is None:
+            # Not a recipe column: every row lacks it
+            for i in range(len(rows)):
+                if failures[i] is None:
+                    failures[i] = f"REJECT: missing nutrition field '{nutrient}'"
+            continue
+
+        # Columns are NOT NULL numerics, so no per-value float() guard;
+        # the None check covers rows hydrated outside the database
+        col = np.zeros(len(rows), dtype=np.float32)
+        for i, recipe in enumerate(rows):
+            value = get(recipe)
+            if value is None:
+                if failures[i] is None:
+                    failures[i] = f"REJECT: missing nutrition field '{nutrient}'"
+            else:
+                col[i] = value
+
+        if "min" in constraints:
+            cmin = constraints["min"]
+            for i in np.flatnonzero(col < cmin):
+                if failures[i] is None:
+                    failures[i] = f"REJECT: {nutrient} {col[i]} < min {cmin}"
+        if "max" in constraints:
+            cmax = constraints["max"]
+            for i in np.flatnonzero(col > cmax):
+                if failures[i] is None:
+                    failures[i] = f"REJECT: {nutrient} {col[i]} > max {cmax}"
+
+    return failures
+
+
+def match_needles(view: RecipeView, parsed: NormalizedQuery) -> frozenset:
+    """Query terms found in this recipe's search text, probed once each.
+
+    Hard filtering and scoring both test the same needles against the
+    multi-KB search_text; computing the matched set once per recipe
+    halves those scans. search_text embeds the lowercased title, so a
+    hit here covers the title-or-text membership checks too (the scoring
+    tiers that care specifically about the title still probe it).
+    """
+    # Token-set fast path: a whole-word hit is one hash probe, and most
+    # matched terms (single-word ingredients, categories, meal types) hit
+    # it. Substring fallback keeps the semantics exact — token absence
+    # doesn't rule out a match inside a longer word or across a phrase.
+    text = view.search_text_lower
+    tokens = view.text_token_set
+
+    # Excluded terms first, in query order, stopping at the first hit:
+    # one matched exclusion already rejects the recipe in
+    # evaluate_hard_filters, so the remaining needles never need probing
+    for needle in parsed.excluded:
+        if needle in tokens or needle in text:
+            return frozenset((needle,))
+
+    needles = set(parsed.required)
+    needles.update(parsed.categories)
+    if parsed.dish:
+        needles.add(parsed.dish)
+    if parsed.meal_type:
+        needles.add(parsed.meal_type)
+    # Terms probed above already missed; don't scan them again
+    needles.difference_update(parsed.excluded)
+
+    return frozenset(
+        needle for needle in needles if needle in tokens or needle in text
+    )
 
-def evaluate_hard_filters(recipe, parsed: Dict[str, Any]) -> FilterEval:
+
+def evaluate_hard_filters(view: RecipeView, parsed: NormalizedQuery,
+                          hits: frozenset,
+                          nutrition_failure: Optional[str] = None) -> FilterEval:
     """Mirror the intent of DB-mode hard filtering in `RecipeMatcher._search_database`."""
 
     reasons: List[str] = []
 
-    title_lower = (recipe.title or "").lower()
-    search_text_lower = (recipe.search_text or "").lower()
-
     # 1) Excluded ingredients (instant reject)
-    for exc in parsed.get("excluded_ingredients", []) or []:
-        exc_lower = (exc or "").lower()
-        if exc_lower and (exc_lower in title_lower or exc_lower in search_text_lower):
+    for exc_lower in parsed.excluded:
+        if exc_lower in hits:
             reasons.append(f"REJECT: contains excluded ingredient '{exc_lower}'")
             return FilterEval(False, reasons)
 
-    # 2) Nutrition constraints (instant reject if not met)
-    nutrition_req: Dict[str, Dict[str, float]] = parsed.get("nutrition", {}) or {}
-    for nutrient, constraints in nutrition_req.items():
-        value = getattr(recipe, nutrient, None)
-        if value is None:
-            reasons.append(f"REJECT: missing nutrition field '{nutrient}'")
-            return FilterEval(False, reasons)
-
-        try:
-            numeric_value = float(value)
-        except (TypeError, ValueError):
-            reasons.append(f"REJECT: invalid nutrition value for '{nutrient}': {value!r}")
-            return FilterEval(False, reasons)
-
-        if "min" in constraints and numeric_value < float(constraints["min"]):
-            reasons.append(f"REJECT: {nutrient} {numeric_value} < min {constraints['min']}")
-            return FilterEval(False, reasons)
-        if "max" in constraints and numeric_value > float(constraints["max"]):
-            reasons.append(f"REJECT: {nutrient} {numeric_value} > max {constraints['max']}")
-            return FilterEval(False, reasons)
+    # 2) Nutrition constraints (instant reject if not met) — evaluated
+    #    across all fetched rows at once by batch_nutrition_failures
+    if nutrition_failure is not None:
+        reasons.append(nutrition_failure)
+        return FilterEval(False, reasons)
 
     # 3) Required ingredients (must have ALL)
-    for ing in parsed.get("ingredients", []) or []:
-        ing_lower = (ing or "").lower()
-        if ing_lower and (ing_lower not in title_lower and ing_lower not in search_text_lower):
+    for ing_lower in parsed.required:
+        if ing_lower not in hits:
             reasons.append(f"REJECT: missing required ingredient '{ing_lower}'")
             return FilterEval(False, reasons)
 
     # 4) Dish name (if specified)
-    dish_name = parsed.get("dish_name")
-    if dish_name:
-        dish_lower = dish_name.lower()
-        if dish_lower not in title_lower and dish_lower not in search_text_lower:
-            reasons.append(f"REJECT: missing dish_name '{dish_lower}'")
-            return FilterEval(False, reasons)
+    if parsed.dish and parsed.dish not in hits:
+        reasons.append(f"REJECT: missing dish_name '{parsed.dish}'")
+        return FilterEval(False, reasons)
 
     reasons.append("PASS: all hard filters satisfied")
     return FilterEval(True, reasons)
 
 
-def score_breakdown(recipe, parsed: Dict[str, Any]) -> Tuple[float, Dict[str, Any]]:
+def score_breakdown(view: RecipeView, parsed: NormalizedQuery,
+                    hits: frozenset) -> Tuple[float, Dict[str, Any]]:
     """Replicate `RecipeMatcher._calculate_recipe_score` but return detailed components."""
 
     score = 0.0
@@ -105,42 +258,43 @@ def score_breakdown(recipe, parsed: Dict[str, Any]) -> Tuple[float, Dict[str, An
         "combo_bonus": {"points": 0.0, "details": None},
         "categories": {"points": 0.0, "matched": []},
         "meal_type": {"points": 0.0, "matched": False},
-        "nutrition_bonus": {"points": 0.0, "constraints": list((parsed.get("nutrition") or {}).keys())},
+        "nutrition_bonus": {"points": 0.0, "constraints": list(parsed.nutrition.keys())},
     }
 
-    title_lower = (recipe.title or "").lower()
-    search_text_lower = (recipe.search_text or "").lower()
+    title_lower = view.title_lower
+    title_words = view.title_words
 
     # DISH NAME
-    dish_name = parsed.get("dish_name")
-    if dish_name:
-        dish_lower = dish_name.lower()
+    dish_lower = parsed.dish
+    if dish_lower:
         points = 0.0
         detail = {"dish": dish_lower, "rule": None}
 
+        # A tokenized title word is always space-bordered in the padded
+        # title, so the set probe covers that branch without allocating
+        # the two padded copies; the padded comparison only runs for the
+        # rare bordered-but-not-tokenized (e.g. multi-word) dish names
         if title_lower == dish_lower:
             points = 100
             detail["rule"] = "exact title match"
-        elif f" {dish_lower} " in f" {title_lower} ":
-            title_words = title_lower.split()
-            if dish_lower in title_words:
-                position = title_words.index(dish_lower)
-                if position == 0:
-                    points = 60
-                    detail["rule"] = "whole word in title (first word)"
-                elif position == len(title_words) - 1:
-                    points = 65
-                    detail["rule"] = "whole word in title (last word)"
-                else:
-                    points = 55
-                    detail["rule"] = "whole word in title (middle word)"
+        elif dish_lower in view.title_word_set:
+            position = view.title_word_index[dish_lower]
+            if position == 0:
+                points = 60
+                detail["rule"] = "whole word in title (first word)"
+            elif position == len(title_words) - 1:
+                points = 65
+                detail["rule"] = "whole word in title (last word)"
             else:
-                points = 50
-                detail["rule"] = "whole word-ish match"
+                points = 55
+                detail["rule"] = "whole word in title (middle word)"
+        elif f" {dish_lower} " in f" {title_lower} ":
+            points = 50
+            detail["rule"] = "whole word-ish match"
         elif dish_lower in title_lower:
             points = 35
             detail["rule"] = "partial match in title"
-        elif dish_lower in search_text_lower:
+        elif dish_lower in hits:
             points = 20
             detail["rule"] = "match in search_text"
 
@@ -149,9 +303,8 @@ def score_breakdown(recipe, parsed: Dict[str, Any]) -> Tuple[float, Dict[str, An
         breakdown["dish_name"]["details"] = detail
 
     # REQUIRED INGREDIENTS
-    required_ingredients = parsed.get("ingredients", []) or []
-    for ingredient in required_ingredients:
-        ing_lower = ingredient.lower()
+    required_ingredients = parsed.required
+    for ing_lower in required_ingredients:
         ing_points = 0.0
         detail: Dict[str, Any] = {
             "ingredient": ing_lower,
@@ -164,12 +317,11 @@ def score_breakdown(recipe, parsed: Dict[str, Any]) -> Tuple[float, Dict[str, An
 
         if ing_lower in title_lower:
             detail["in_title"] = True
-            title_words = title_lower.split()
             base = 15
             pos_bonus = 0.0
 
-            if ing_lower in title_words:
-                position = title_words.index(ing_lower)
+            if ing_lower in view.title_word_set:
+                position = view.title_word_index[ing_lower]
                 if position == 0:
                     pos_bonus = 10
                 elif position == 1:
@@ -185,7 +337,7 @@ def score_breakdown(recipe, parsed: Dict[str, Any]) -> Tuple[float, Dict[str, An
             detail["title_points"] = base + pos_bonus
             ing_points += detail["title_points"]
 
-        if ing_lower in search_text_lower:
+        if ing_lower in hits:
             detail["in_search_text"] = True
             detail["text_points"] = 10
             ing_points += 10
@@ -194,20 +346,17 @@ def score_breakdown(recipe, parsed: Dict[str, Any]) -> Tuple[float, Dict[str, An
         breakdown["ingredients"].append({"points": ing_points, "details": detail})
 
     # COMBO BONUS
-    if dish_name and required_ingredients:
-        dish_lower = dish_name.lower()
-        ingredients_in_title = sum(1 for ing in required_ingredients if ing.lower() in title_lower)
+    if dish_lower and required_ingredients:
+        ingredients_in_title = sum(1 for ing in required_ingredients if ing in title_lower)
         if dish_lower in title_lower and ingredients_in_title > 0:
             points = 20.0
             proximity_awarded = False
 
-            title_words = title_lower.split()
-            if dish_lower in title_words:
-                dish_idx = title_words.index(dish_lower)
-                for ing in required_ingredients:
-                    ing_lower = ing.lower()
-                    if ing_lower in title_words:
-                        ing_idx = title_words.index(ing_lower)
+            if dish_lower in view.title_word_set:
+                dish_idx = view.title_word_index[dish_lower]
+                for ing_lower in required_ingredients:
+                    if ing_lower in view.title_word_set:
+                        ing_idx = view.title_word_index[ing_lower]
                         if abs(dish_idx - ing_idx) <= 2:
                             points += 10
                             proximity_awarded = True
@@ -222,11 +371,9 @@ def score_breakdown(recipe, parsed: Dict[str, Any]) -> Tuple[float, Dict[str, An
             }
 
     # CATEGORY
-    categories = parsed.get("categories", []) or []
     matched_cats: List[str] = []
-    for category in categories:
-        cat_lower = category.lower()
-        if cat_lower in search_text_lower:
+    for cat_lower in parsed.categories:
+        if cat_lower in hits:
             matched_cats.append(cat_lower)
             score += 12
 
@@ -234,16 +381,14 @@ def score_breakdown(recipe, parsed: Dict[str, Any]) -> Tuple[float, Dict[str, An
     breakdown["categories"]["points"] = 12.0 * len(matched_cats)
 
     # MEAL TYPE
-    meal_type = parsed.get("meal_type")
-    if meal_type and meal_type.lower() in search_text_lower:
+    if parsed.meal_type and parsed.meal_type in hits:
         score += 15
         breakdown["meal_type"]["points"] = 15.0
         breakdown["meal_type"]["matched"] = True
 
     # NUTRITION BONUS
-    nutrition_req = parsed.get("nutrition", {}) or {}
-    if nutrition_req:
-        points = 20.0 * len(nutrition_req)
+    if parsed.nutrition:
+        points = 20.0 * len(parsed.nutrition)
         score += points
         breakdown["nutrition_bonus"]["points"] = points
 
@@ -252,7 +397,41 @@ def score_breakdown(recipe, parsed: Dict[str, Any]) -> Tuple[float, Dict[str, An
     return score, breakdown
 
 
+def _empty_breakdown(parsed: NormalizedQuery) -> Dict[str, Any]:
+    """Zeroed breakdown skeleton for rows rejected before scoring."""
+    return {
+        "dish_name": {"points": 0.0, "details": None},
+        "ingredients": [],
+        "combo_bonus": {"points": 0.0, "details": None},
+        "categories": {"points": 0.0, "matched": []},
+        "meal_type": {"points": 0.0, "matched": False},
+        "nutrition_bonus": {"points": 0.0, "constraints": list(parsed.nutrition.keys())},
+        "total_points": 0.0,
+        "normalized_score": 0.0,
+    }
+
+
+def evaluate_and_score(view: RecipeView, parsed: NormalizedQuery,
+                       hits: frozenset,
+                       nutrition_failure: Optional[str] = None
+                       ) -> Tuple[FilterEval, float, Dict[str, Any]]:
+    """Hard-filter and score a recipe in one fused pass.
+
+    Both phases consume the same RecipeView and matched-needle set, so
+    no string is lowered or scanned twice; rejected rows short-circuit
+    with a zeroed breakdown instead of running the scoring loops.
+    """
+    filt = evaluate_hard_filters(view, parsed, hits, nutrition_failure)
+    if not filt.passed:
+        return filt, 0.0, _empty_breakdown(parsed)
+
+    total_score, breakdown = score_breakdown(view, parsed, hits)
+    return filt, total_score, breakdown
+
+
+@functools.lru_cache(maxsize=4096)
 def _md_escape(text: Optional[str]) -> str:
+    # Memoized: titles and boilerplate reasons repeat across report lines
     s = (text or "").replace("\r\n", "\n").replace("\r", "\n")
     return s.replace("`", "\\`")
 
@@ -265,7 +444,10 @@ def render_report_md(payload: Dict[str, Any]) -> str:
     lines: List[str] = []
     lines.append("# Search walkthrough report (case 01)")
     lines.append("")
-    lines.append(f"Generated: {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')} UTC")
+    # isoformat is a direct C formatter; strftime round-trips through the
+    # locale-aware format-string machinery for the same output
+    generated = datetime.now(timezone.utc).replace(microsecond=0, tzinfo=None)
+    lines.append(f"Generated: {generated.isoformat(sep=' ')} UTC")
     lines.append("")
     lines.append("## Query")
     lines.append("")
@@ -303,14 +485,23 @@ def render_report_md(payload: Dict[str, Any]) -> str:
         return "\n".join(lines)
 
     for item in results:
+        # Hoist the shared sub-dicts once per result; the f-strings below
+        # reuse these locals instead of re-walking the item dict
         rank = item.get("rank")
         recipe_id = item.get("id")
         title = item.get("title")
-        score_norm = item.get("score", {}).get("normalized_0_1")
-        score_0_100 = item.get("score", {}).get("rule_score_0_100")
-        hard_filters = item.get("hard_filters", {}) or {}
-        breakdown = item.get("score", {}).get("breakdown", {}) or {}
-        nutrition = item.get("nutrition", {}) or {}
+        score_d = item.get("score") or {}
+        score_norm = score_d.get("normalized_0_1")
+        score_0_100 = score_d.get("rule_score_0_100")
+        hard_filters = item.get("hard_filters") or {}
+        breakdown = score_d.get("breakdown") or {}
+        nutrition = item.get("nutrition") or {}
+        dish_bd = breakdown.get("dish_name") or {}
+        combo_bd = breakdown.get("combo_bonus") or {}
+        cat_bd = breakdown.get("categories") or {}
+        meal_bd = breakdown.get("meal_type") or {}
+        nut_bd = breakdown.get("nutrition_bonus") or {}
+        ing_items = breakdown.get("ingredients") or []
 
         lines.append(f"### #{rank} — id={recipe_id} — score={score_norm} ({score_0_100}/100)")
         lines.append("")
@@ -326,10 +517,11 @@ def render_report_md(payload: Dict[str, Any]) -> str:
 
         lines.append("**Score breakdown**")
         lines.append("")
-        lines.append(f"- dish_name: `{breakdown.get('dish_name', {}).get('points', 0)}`")
+        lines.append(f"- dish_name: `{dish_bd.get('points', 0)}`")
 
-        ing_items = breakdown.get("ingredients", []) or []
-        ing_total = sum((x.get("points") or 0) for x in ing_items)
+        ing_total = 0.0
+        for x in ing_items:
+            ing_total += x.get("points") or 0
         lines.append(f"- ingredients total: `{ing_total}`")
         for ing in ing_items:
             d = (ing.get("details") or {})
@@ -338,10 +530,10 @@ def render_report_md(payload: Dict[str, Any]) -> str:
                 f"(title=`{d.get('title_points')}`, text=`{d.get('text_points')}`)"
             )
 
-        lines.append(f"- combo_bonus: `{breakdown.get('combo_bonus', {}).get('points', 0)}`")
-        lines.append(f"- categories: `{breakdown.get('categories', {}).get('points', 0)}`")
-        lines.append(f"- meal_type: `{breakdown.get('meal_type', {}).get('points', 0)}`")
-        lines.append(f"- nutrition_bonus: `{breakdown.get('nutrition_bonus', {}).get('points', 0)}`")
+        lines.append(f"- combo_bonus: `{combo_bd.get('points', 0)}`")
+        lines.append(f"- categories: `{cat_bd.get('points', 0)}`")
+        lines.append(f"- meal_type: `{meal_bd.get('points', 0)}`")
+        lines.append(f"- nutrition_bonus: `{nut_bd.get('points', 0)}`")
         lines.append(f"- total_points: `{breakdown.get('total_points')}`")
         lines.append("")
 
@@ -393,24 +585,56 @@ def main() -> int:
     matcher = RecipeMatcher(recipes, metadata)
 
     parsed = qp.parse(args.query)
+    normalized = normalize_parsed(parsed)
 
     # Run search
     results = matcher.search(parsed, max_results=args.max_results)
 
     # Re-fetch full rows for accurate filter + score breakdown
     from core.models import get_session, Recipe  # local import to honor DATABASE_URL
+    from sqlalchemy.orm import load_only
+
+    # Session is a context manager in SQLAlchemy 1.4+: close on exit
+    # without the manual try/finally. The shared engine already caches
+    # compiled statements (query_cache_size), so repeated invocations
+    # in a sweep reuse plans.
+    with get_session() as session:
+        # One IN query for every result row instead of a round trip per
+        # rank; rank order is preserved by walking `results` below
+        ids = [r.get("id") for r in results]
+        by_id: Dict[int, Recipe] = {}
+        if ids:
+            rows = (
+                session.query(Recipe)
+                .options(load_only(
+                    Recipe.id, Recipe.title, Recipe.description, Recipe.search_text,
+                    Recipe.calories, Recipe.protein, Recipe.fat,
+                    Recipe.sodium, Recipe.sugar, Recipe.saturates,
+                ))
+                .filter(Recipe.id.in_(ids))
+                .all()
+            )
+            by_id = {row.id: row for row in rows}
 
-    session = get_session()
-    try:
-        enriched: List[Dict[str, Any]] = []
-        for rank, r in enumerate(results, start=1):
-            recipe_id = r.get("id")
-            full = session.query(Recipe).filter(Recipe.id == recipe_id).first()
-            if not full:
-                continue
+        ordered = [
+            (rank, full)
+            for rank, full in (
+                (rank, by_id.get(r.get("id")))
+                for rank, r in enumerate(results, start=1)
+            )
+            if full is not None
+        ]
+        nutrition_failures = batch_nutrition_failures(
+            [full for _, full in ordered], normalized
+        )
 
-            filt = evaluate_hard_filters(full, parsed)
-            total_score, breakdown = score_breakdown(full, parsed)
+        enriched: List[Dict[str, Any]] = []
+        for (rank, full), nutrition_failure in zip(ordered, nutrition_failures):
+            view = RecipeView.from_recipe(full)
+            hits = match_needles(view, normalized)
+            filt, total_score, breakdown = evaluate_and_score(
+                view, normalized, hits, nutrition_failure
+            )
 
             enriched.append(
                 {
@@ -444,8 +668,15 @@ def main() -> int:
 
         if args.write_json:
             os.makedirs(os.path.dirname(os.path.abspath(args.write_json)), exist_ok=True)
-            with open(args.write_json, "w", encoding="utf-8") as f:
-                json.dump(payload, f, indent=2, default=str)
+            # orjson emits one bytes buffer instead of stdlib json's tree
+            # of str fragments — the indent=2 pretty printer is the slow
+            # part for large --max-results payloads
+            if orjson is not None:
+                with open(args.write_json, "wb") as f:
+                    f.write(orjson.dumps(payload, default=str, option=orjson.OPT_INDENT_2))
+            else:
+                with open(args.write_json, "w", encoding="utf-8") as f:
+                    json.dump(payload, f, indent=2, default=str)
 
         if args.report_path:
             os.makedirs(os.path.dirname(os.path.abspath(args.report_path)), exist_ok=True)
@@ -453,7 +684,15 @@ def main() -> int:
                 f.write(render_report_md(payload))
 
         if args.json:
-            print(json.dumps(payload, indent=2, default=str))
+            # default=str runs in C under orjson instead of one Python
+            # callback per non-native value
+            if orjson is not None:
+                sys.stdout.buffer.write(
+                    orjson.dumps(payload, default=str, option=orjson.OPT_INDENT_2)
+                )
+                sys.stdout.buffer.write(b"\n")
+            else:
+                print(json.dumps(payload, indent=2, default=str))
             return 0
 
         # Human-readable output
@@ -515,9 +754,6 @@ def main() -> int:
         print("=" * 80)
         return 0
 
-    finally:
-        session.close()
-
 
 if __name__ == "__main__":
     raise SystemExit(main())